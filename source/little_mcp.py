@@ -12,35 +12,55 @@ VERSION = "0.5.1 dual-provider - text/ graph option"
 
 
 import requests
+import httpx
 import json
+import hashlib
+import importlib
+import math
+import re
+import sqlite3
 import warnings
 import os
 import sys
+import asyncio
+import contextvars
+import queue
+import threading
+import time
 import argparse
-from typing import Type
+import subprocess
+import tempfile
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, List, Optional, Type
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # --- Pydantic ---
 from pydantic import BaseModel, Field
 
 # --- LangChain Core & Agent Imports ---
 from langchain_core.tools import BaseTool
+from langchain_core.embeddings import Embeddings
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
 
-# --- LangGraph for Agent ---
-from langgraph.prebuilt import create_react_agent
-
-# --- LangChain Community Imports (Loaders & Stores) ---
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_community.vectorstores import Chroma
-
-# --- Specific Integration Packages ---
-from langchain_ollama import ChatOllama, OllamaEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-
-import gradio as gr
+# --- Heavy integrations are imported where they are used, so each mode only pays
+# for what it needs (no gradio in text mode, no PDF loader when the store is current):
+#   langgraph.prebuilt            -> FastMCPLangChainClient.initialize
+#   langchain_community (Chroma)  -> RAGSystem._prepare_vector_store
+#   langchain_community (PDF)     -> iter_pdf_pages
+#   langchain_ollama              -> get_llm, RAGSystem.__init__
+#   langchain_text_splitters      -> DocumentIngestor.iter_chunks, benchmark_pdf_extraction
+#   pypdf, numpy                  -> PDF extraction, SemanticAnswerCache
+#   gradio                        -> main (graph mode)
+# Run with --import-report to see what a mode imports and how long it takes.
 import datetime  
 
 warnings.filterwarnings("ignore", category=DeprecationWarning)
@@ -52,8 +72,87 @@ load_dotenv()
 # =================================================================
 
 SERVER_URL = "http://127.0.0.1:8000"
+OLLAMA_URL = "http://127.0.0.1:11434"
+OLLAMA_KEEP_ALIVE      = "30m"   # how long Ollama keeps the models loaded after the last request
+OLLAMA_WARMUP_TIMEOUT  = 300.0   # seconds allowed for the background model load at startup
 PDF_DOCUMENT_PATH = "./data/Candidates and Scores List - Test Data - compact.pdf"
 CHROMA_DB_PATH = "chroma_db_rag"
+INGEST_MANIFEST_FILE = "ingest_manifest.json"    # kept inside CHROMA_DB_PATH
+BM25_INDEX_FILE      = "bm25_index.json"         # kept inside CHROMA_DB_PATH
+EMBEDDING_MODEL = "nomic-embed-text"
+EMBEDDING_CACHE_PATH = "embedding_cache.sqlite"  # outlives CHROMA_DB_PATH rebuilds
+
+# Document chunking
+CHUNK_SIZE    = 1000
+CHUNK_OVERLAP = 200
+
+# PDF text extraction: worker processes (--workers) and pages handed to each task
+EXTRACT_WORKERS        = 1
+EXTRACT_PAGES_PER_TASK = 16
+
+# `benchmark` mode replicates this PDF to BENCHMARK_PAGES pages and times extraction
+BENCHMARK_PDF_PATH = "./data/Candidates and Scores List - Test Data.pdf"
+BENCHMARK_PAGES    = 2000
+
+# Hybrid retrieval: BM25 + vector candidates fused with reciprocal-rank fusion
+RETRIEVAL_K       = 3      # chunks pasted into the prompt
+RETRIEVAL_FETCH_K = 10     # candidates taken from each retriever before fusion
+RRF_K             = 60
+
+# Context packing: retrieved chunks are de-overlapped, merged and cut to this many prompt tokens
+CONTEXT_TOKEN_BUDGET = 1200
+CHARS_PER_TOKEN      = 4      # rough estimate, no tokenizer needed
+MIN_MERGE_OVERLAP    = 20     # shortest shared text (chars) treated as chunk overlap
+
+# Semantic answer cache for document Q&A: questions at least this cosine-similar share an answer
+ANSWER_CACHE_THRESHOLD = 0.95
+ANSWER_CACHE_SIZE      = 256
+ANSWER_CACHE_TTL       = 3600.0   # seconds
+
+# Embedding during ingestion: chunks per request and parallel requests to Ollama
+EMBED_BATCH_SIZE  = 64
+EMBED_CONCURRENCY = 4
+
+# HTTP connection pool to the MCP server
+HTTP_POOL_SIZE = 10
+HTTP_TIMEOUT   = 30.0    # seconds per tool call
+HTTP_RETRIES   = 2       # retried on connection errors only (requests never reached the server)
+
+# Tool calls made within BATCH_WINDOW seconds of each other share one /batch request (--batch)
+BATCH_WINDOW = 0.01
+
+# Parallel tool calls: per-tool concurrency limits and per-call timeouts
+TOOL_CONCURRENCY_DEFAULT = 4
+TOOL_CONCURRENCY = {"document_qa_system": 1}     # the RAG tool shares the local LLM
+TOOL_TIMEOUT_DEFAULT = 30.0                       # seconds
+TOOL_TIMEOUTS = {"document_qa_system": 120.0}
+
+# Client-side cache of MCP tool results: seconds a result stays fresh per tool
+# (None = until invalidated, tools not listed are never cached)
+TOOL_CACHE_TTL = {"get_calc": None, "get_weather": 600.0, "get_SQL_response": None}
+TOOL_CACHE_INVALIDATES = {"put_SQL_insert": ("get_SQL_response",)}   # a write drops these reads
+TOOL_CACHE_CASE_INSENSITIVE = {"get_weather"}                         # city names
+TOOL_CACHE_SQL = {"get_SQL_response"}    # whitespace inside string literals is kept
+TOOL_CACHE_SIZE = 512
+
+# Chat history: recent turns kept verbatim, older ones folded into a rolling summary
+HISTORY_KEEP_TURNS     = 4
+HISTORY_TOKEN_BUDGET   = 2000   # estimated tokens for the verbatim turns
+TOOL_OBSERVATION_CHARS = 300    # tool results are kept in history trimmed to this size
+
+# Sessions (graph mode): one conversation per browser session, evicted when idle
+DEFAULT_SESSION      = "default"
+SESSION_IDLE_TIMEOUT = 1800.0   # seconds
+MAX_SESSIONS         = 100
+GRADIO_CONCURRENCY   = 16       # chat requests processed at once
+GRADIO_QUEUE_SIZE    = 64       # waiting requests before new ones are rejected
+
+# Modules each mode imports lazily on a normal start (vector store already current)
+MODE_IMPORTS = {
+    "text": ["langchain_ollama", "langchain_community.vectorstores", "langgraph.prebuilt", "numpy"],
+    "graph": ["langchain_ollama", "langchain_community.vectorstores", "langgraph.prebuilt", "numpy", "gradio"],
+    "benchmark": ["pypdf", "langchain_text_splitters"],
+}
 
 # Default models
 DEFAULT_OLLAMA_MODEL   = "qwen3:4b"
@@ -97,48 +196,767 @@ def get_llm(provider: str, api_key: str = None, model: str = None, temperature:
     else:  # default: ollama
         resolved_model = model or DEFAULT_OLLAMA_MODEL
         print(f"[LLM Factory] Using local Ollama — model: {resolved_model}")
-        return ChatOllama(model=resolved_model, temperature=temperature)
+        from langchain_ollama import ChatOllama
+        return ChatOllama(model=resolved_model, temperature=temperature, keep_alive=OLLAMA_KEEP_ALIVE)
+
+
+# =================================================================
+# PROMPT CACHING (Anthropic)
+# =================================================================
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def cacheable_tool_schemas(tools: list) -> list:
+    """
+    Anthropic tool definitions with a cache breakpoint on the last one. Tools come first
+    in the prompt, so every agent step then reads all tool descriptions from the cache.
+    """
+    from langchain_anthropic.chat_models import convert_to_anthropic_tool
+    schemas = [dict(convert_to_anthropic_tool(tool)) for tool in tools]
+    if schemas:
+        schemas[-1]["cache_control"] = CACHE_CONTROL
+    return schemas
+
+
+def mark_cacheable(messages: list) -> list:
+    """
+    Returns a copy of the turn's messages with cache breakpoints on the rolling summary
+    and on the last resent history message (the new user message stays uncached).
+    Together with the tool schemas this uses three of Anthropic's four breakpoints.
+    """
+    marked = [dict(message) for message in messages]
+    positions = {len(marked) - 2} if len(marked) > 1 else set()
+    if marked and marked[0]["role"] == "system":
+        positions.add(0)
+    for position in positions:
+        content = marked[position]["content"]
+        if isinstance(content, str):
+            marked[position]["content"] = [{"type": "text", "text": content, "cache_control": CACHE_CONTROL}]
+    return marked
+
+
+def prompt_cache_usage(messages: list) -> dict:
+    """Sums input and cache-read/cache-write tokens over the model calls of one turn."""
+    usage = {"calls": 0, "input": 0, "cache_read": 0, "cache_write": 0}
+    for message in messages:
+        metadata = getattr(message, "usage_metadata", None)
+        if message.type != "ai" or not metadata:
+            continue
+        details = metadata.get("input_token_details") or {}
+        usage["calls"] += 1
+        usage["input"] += metadata.get("input_tokens") or 0
+        usage["cache_read"] += details.get("cache_read") or 0
+        usage["cache_write"] += details.get("cache_creation") or 0
+    return usage
+
+
+# =================================================================
+# TOOL CALL SCHEDULING
+# =================================================================
+
+class ToolCallGuard:
+    """
+    Bounds how many calls of each tool run at once, enforces per-call timeouts and
+    records call timings, so a turn that fans out several tool calls can report the
+    wall-clock time saved versus running them one after another.
+    """
+
+    def __init__(self, concurrency: dict = None, timeouts: dict = None):
+        self.concurrency = {**TOOL_CONCURRENCY, **(concurrency or {})}
+        self.timeouts = {**TOOL_TIMEOUTS, **(timeouts or {})}
+        self._semaphores = {}
+        # (tool_name, start, end) of the current turn; a context variable so concurrent
+        # sessions sharing the tools each see only their own calls
+        self._calls = contextvars.ContextVar("tool_calls", default=None)
+
+    def _semaphore(self, tool_name: str) -> asyncio.Semaphore:
+        if tool_name not in self._semaphores:
+            limit = self.concurrency.get(tool_name, TOOL_CONCURRENCY_DEFAULT)
+            self._semaphores[tool_name] = asyncio.Semaphore(limit)
+        return self._semaphores[tool_name]
+
+    async def run(self, tool_name: str, coro) -> str:
+        timeout = self.timeouts.get(tool_name, TOOL_TIMEOUT_DEFAULT)
+        async with self._semaphore(tool_name):
+            start = time.perf_counter()
+            try:
+                return await asyncio.wait_for(coro, timeout=timeout)
+            except asyncio.TimeoutError:
+                return f"Tool {tool_name} timed out after {timeout:.0f}s."
+            finally:
+                calls = self._calls.get()
+                if calls is not None:
+                    calls.append((tool_name, start, time.perf_counter()))
+
+    def reset(self):
+        """Starts a new turn in the current context (tool tasks spawned from it share the list)."""
+        self._calls.set([])
+
+    def timing_summary(self) -> dict:
+        """Sequential time (sum of call durations) versus wall-clock time (union of call intervals)."""
+        calls = self._calls.get() or []
+        sequential = sum(end - start for _, start, end in calls)
+        wall_clock = 0.0
+        covered_until = None
+        for _, start, end in sorted(calls, key=lambda call: call[1]):
+            if covered_until is None or start >= covered_until:
+                wall_clock += end - start
+                covered_until = end
+            elif end > covered_until:
+                wall_clock += end - covered_until
+                covered_until = end
+        return {
+            "calls": len(calls),
+            "sequential": sequential,
+            "wall_clock": wall_clock,
+            "saved": sequential - wall_clock,
+        }
+
+
+# =================================================================
+# DOCUMENT INGESTION
+# =================================================================
+
+def list_pdf_documents(path: str) -> list:
+    """A single PDF file, or every PDF under a directory (recursively, in a stable order)."""
+    if os.path.isfile(path):
+        return [path]
+    found = []
+    for root, _, files in os.walk(path):
+        found.extend(os.path.join(root, name) for name in files if name.lower().endswith(".pdf"))
+    return sorted(found)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extract_pdf_page_range(path: str, start: int, stop: int) -> list:
+    """Process-pool worker: returns (text, metadata) for pages [start, stop) of one PDF."""
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    total_pages = len(reader.pages)
+    return [
+        (reader.pages[i].extract_text(), {"source": path, "page": i, "total_pages": total_pages})
+        for i in range(start, stop)
+    ]
+
+
+def iter_pdf_pages(path: str, executor: ProcessPoolExecutor = None, workers: int = 1,
+                   pages_per_task: int = EXTRACT_PAGES_PER_TASK):
+    """
+    Yields one Document per page, in page order. With an executor, page ranges are
+    extracted in parallel by `workers` processes, keeping at most 2 * workers ranges
+    in flight so memory stays bounded.
+    """
+    if executor is None:
+        from langchain_community.document_loaders import PyPDFLoader
+        yield from PyPDFLoader(path).lazy_load()
+        return
+
+    from pypdf import PdfReader
+    total_pages = len(PdfReader(path).pages)
+    pending = deque()
+    for start in range(0, total_pages, pages_per_task):
+        if len(pending) >= 2 * workers:
+            for text, metadata in pending.popleft().result():
+                yield Document(page_content=text, metadata=metadata)
+        pending.append(executor.submit(extract_pdf_page_range, path, start, min(start + pages_per_task, total_pages)))
+    while pending:
+        for text, metadata in pending.popleft().result():
+            yield Document(page_content=text, metadata=metadata)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embedding model with a content-addressed cache on disk.
+
+    Vectors are stored in SQLite as float32 blobs keyed by (model, sha256(text)), so
+    re-indexing unchanged text or repeating a question never reaches the model.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache_path: str = EMBEDDING_CACHE_PATH):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(cache_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT, text_hash TEXT, vector BLOB, PRIMARY KEY (model, text_hash))"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def _hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _lookup(self, model: str, hashes: list) -> dict:
+        found = {}
+        with self._lock:
+            for text_hash in set(hashes):
+                row = self._db.execute(
+                    "SELECT vector FROM embeddings WHERE model = ? AND text_hash = ?", (model, text_hash)
+                ).fetchone()
+                if row is not None:
+                    found[text_hash] = array("f", row[0]).tolist()
+        return found
+
+    def _store(self, model: str, items: list):
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector) VALUES (?, ?, ?)",
+                [(model, text_hash, array("f", vector).tobytes()) for text_hash, vector in items]
+            )
+            self._db.commit()
+
+    def embed_documents(self, texts: list) -> list:
+        hashes = [self._hash(text) for text in texts]
+        cached = self._lookup(self.model_name, hashes)
+        missing = {}
+        for text_hash, text in zip(hashes, texts):
+            if text_hash not in cached:
+                missing.setdefault(text_hash, text)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = list(zip(missing.keys(), vectors))
+            self._store(self.model_name, computed)
+            cached.update(computed)
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        return [cached[text_hash] for text_hash in hashes]
+
+    def embed_query(self, text: str) -> list:
+        # Queries may be embedded differently from documents, so they get their own key space
+        model = f"{self.model_name}#query"
+        text_hash = self._hash(text)
+        cached = self._lookup(model, [text_hash])
+        if text_hash in cached:
+            self.hits += 1
+            return cached[text_hash]
+        vector = self.embeddings.embed_query(text)
+        self._store(model, [(text_hash, vector)])
+        self.misses += 1
+        return vector
+
+
+class BM25Index:
+    """
+    Local inverted index over chunk text, scored with Okapi BM25.
+
+    Term frequencies are stored per chunk id (the same ids as the Chroma store) so
+    chunks can be added and removed as the ingestor keeps the store in sync.
+    """
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.doc_terms = {}    # chunk_id -> {term: tf}
+        self.doc_lengths = {}  # chunk_id -> number of tokens
+        self.postings = {}     # term -> {chunk_id: tf}
+        self.total_length = 0
+
+    @staticmethod
+    def tokenize(text: str) -> list:
+        return re.findall(r"\w+", text.lower())
+
+    @classmethod
+    def load(cls, path: str):
+        index = cls(path)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for chunk_id, terms in json.load(f).items():
+                    index._add_terms(chunk_id, terms)
+        return index
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.doc_terms, f)
+        os.replace(tmp_path, self.path)
+
+    def _add_terms(self, chunk_id: str, terms: dict):
+        self.doc_terms[chunk_id] = terms
+        self.doc_lengths[chunk_id] = sum(terms.values())
+        self.total_length += self.doc_lengths[chunk_id]
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[chunk_id] = tf
+
+    def add(self, chunk_id: str, text: str):
+        self.remove(chunk_id)
+        terms = {}
+        for term in self.tokenize(text):
+            terms[term] = terms.get(term, 0) + 1
+        self._add_terms(chunk_id, terms)
+
+    def remove(self, chunk_id: str):
+        terms = self.doc_terms.pop(chunk_id, None)
+        if terms is None:
+            return
+        self.total_length -= self.doc_lengths.pop(chunk_id)
+        for term in terms:
+            postings = self.postings[term]
+            del postings[chunk_id]
+            if not postings:
+                del self.postings[term]
+
+    def clear(self):
+        self.doc_terms, self.doc_lengths, self.postings, self.total_length = {}, {}, {}, 0
+
+    def search(self, query: str, k: int) -> list:
+        """Returns up to k (chunk_id, score) pairs, best first."""
+        n_docs = len(self.doc_terms)
+        if not n_docs:
+            return []
+        avg_length = self.total_length / n_docs
+        scores = {}
+        for term in set(self.tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings.items():
+                norm = tf + self.k1 * (1 - self.b + self.b * self.doc_lengths[chunk_id] / avg_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+class DocumentIngestor:
+    """
+    Keeps a Chroma collection in sync with a set of PDF files.
+
+    A JSON manifest records each file's size, mtime, content hash and the ids of its chunks.
+    Chunk ids are derived from the file path and the chunk text, so on every sync:
+      - unchanged files are skipped without being parsed (or even hashed, if size and
+        mtime match),
+      - changed files only embed chunks whose text is new; the metadata of reused chunks
+        is rewritten, since their page and start_index may have moved,
+      - chunks (and files) that disappeared are deleted from the store.
+    """
+
+    def __init__(self, vector_store, embedding_function, manifest_path: str,
+                 chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP,
+                 batch_size: int = EMBED_BATCH_SIZE, concurrency: int = EMBED_CONCURRENCY,
+                 workers: int = EXTRACT_WORKERS):
+        self.vector_store = vector_store
+        self.embedding_function = embedding_function
+        self.manifest_path = manifest_path
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.workers = workers
+        self._extract_pool = None  # started on the first PDF that actually needs parsing
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.text_splitter = None  # likewise, so an up-to-date store never imports the splitter
+        self.bm25 = BM25Index.load(os.path.join(os.path.dirname(manifest_path), BM25_INDEX_FILE))
+        self.manifest = self._load_manifest()
+        if self.manifest["files"] and not self.bm25.doc_terms:
+            self._rebuild_bm25()
+
+    def _rebuild_bm25(self):
+        """Indexes chunks already in the store (e.g. a store built before the BM25 index existed)."""
+        existing = self.vector_store.get(include=["documents"])
+        print(f"[Ingest] Building BM25 index for {len(existing['ids'])} existing chunks...")
+        for chunk_id, text in zip(existing["ids"], existing["documents"]):
+            self.bm25.add(chunk_id, text)
+        self.bm25.save()
+
+    def _load_manifest(self) -> dict:
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        # A store built before manifests existed has random chunk ids we can't match: start clean
+        existing_ids = self.vector_store.get()["ids"]
+        if existing_ids:
+            print(f"[Ingest] No manifest found, clearing {len(existing_ids)} untracked chunks.")
+            self.vector_store.delete(ids=existing_ids)
+        self.bm25.clear()
+        return {"files": {}}
+
+    def _delete_chunks(self, chunk_ids: list):
+        self.vector_store.delete(ids=chunk_ids)
+        for chunk_id in chunk_ids:
+            self.bm25.remove(chunk_id)
+
+    def _save_manifest(self):
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        self.bm25.save()
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    @staticmethod
+    def with_chunk_ids(source: str, chunks):
+        """Yields (id, chunk) with content-addressed ids; repeated text within one file gets an occurrence suffix."""
+        seen = {}
+        for chunk in chunks:
+            text_hash = hashlib.sha256(f"{source}\0{chunk.page_content}".encode("utf-8")).hexdigest()
+            seen[text_hash] = seen.get(text_hash, 0) + 1
+            yield f"{text_hash[:32]}-{seen[text_hash]}", chunk
+
+    def iter_chunks(self, path: str):
+        """Yields chunks page by page, so only one page of text is in memory at a time."""
+        if self.workers > 1 and self._extract_pool is None:
+            self._extract_pool = ProcessPoolExecutor(max_workers=self.workers)
+        if self.text_splitter is None:
+            from langchain_text_splitters import RecursiveCharacterTextSplitter
+            self.text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap, add_start_index=True
+            )
+        for page in iter_pdf_pages(path, self._extract_pool, self.workers):
+            yield from self.text_splitter.split_documents([page])
+
+    def embed_and_store(self, chunks_with_ids) -> int:
+        """
+        Consumes (id, chunk) pairs lazily, embeds them in batches of `batch_size` with up
+        to `concurrency` requests in flight, and writes each batch to the store as soon as
+        its vectors arrive. At most `concurrency + 1` batches are held in memory.
+        """
+        in_flight = deque()
+        done = 0
+        start = time.perf_counter()
+
+        def store_oldest():
+            nonlocal done
+            future, batch = in_flight.popleft()
+            self.vector_store._collection.upsert(
+                ids=[chunk_id for chunk_id, _ in batch],
+                embeddings=future.result(),
+                documents=[chunk.page_content for _, chunk in batch],
+                metadatas=[chunk.metadata for _, chunk in batch],
+            )
+            for chunk_id, chunk in batch:
+                self.bm25.add(chunk_id, chunk.page_content)
+            done += len(batch)
+            elapsed = time.perf_counter() - start
+            print(f"\r[Ingest] {done} chunks embedded ({done / elapsed:.1f} chunks/s)", end="", flush=True)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            def submit(batch):
+                if len(in_flight) >= self.concurrency:
+                    store_oldest()
+                future = executor.submit(self.embedding_function.embed_documents, [c.page_content for _, c in batch])
+                in_flight.append((future, batch))
+
+            batch = []
+            for item in chunks_with_ids:
+                batch.append(item)
+                if len(batch) == self.batch_size:
+                    submit(batch)
+                    batch = []
+            if batch:
+                submit(batch)
+            while in_flight:
+                store_oldest()
+        if done:
+            print()
+        return done
+
+    def _update_metadata(self, chunks: list):
+        """Rewrites the metadata of reused chunks, so pack_context sees their current offsets."""
+        for i in range(0, len(chunks), self.batch_size):
+            batch = chunks[i:i + self.batch_size]
+            self.vector_store._collection.update(
+                ids=[chunk_id for chunk_id, _ in batch],
+                metadatas=[metadata for _, metadata in batch],
+            )
+
+    def sync(self, paths: list) -> dict:
+        try:
+            return self._sync(paths)
+        finally:
+            if self._extract_pool is not None:
+                self._extract_pool.shutdown()
+                self._extract_pool = None
+
+    def _sync(self, paths: list) -> dict:
+        stats = {"files_scanned": 0, "files_changed": 0, "files_removed": 0,
+                 "chunks_added": 0, "chunks_deleted": 0, "embeddings_skipped": 0}
+        tracked = self.manifest["files"]
+        current = {os.path.abspath(path): path for path in paths}
+
+        for source in sorted(set(tracked) - set(current)):
+            stale_ids = tracked.pop(source)["chunk_ids"]
+            if stale_ids:
+                self._delete_chunks(stale_ids)
+            stats["files_removed"] += 1
+            stats["chunks_deleted"] += len(stale_ids)
+
+        for source, path in current.items():
+            stats["files_scanned"] += 1
+            stat = os.stat(path)
+            entry = tracked.get(source)
+            # Size and mtime unchanged: skip without reading the file
+            if entry is not None and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+                stats["embeddings_skipped"] += len(entry["chunk_ids"])
+                continue
+            content_hash = file_sha256(path)
+            if entry is not None and entry["sha256"] == content_hash:
+                entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)   # touched, not changed
+                stats["embeddings_skipped"] += len(entry["chunk_ids"])
+                continue
+
+            print(f"[Ingest] Indexing '{path}'...")
+            old_ids = set(entry["chunk_ids"]) if entry else set()
+            ids = []
+            reused = []   # (id, metadata) of unchanged chunks, whose page/start_index may have moved
+
+            def new_chunks():
+                # page -> chunk -> id, streamed straight into the embedding batches
+                for chunk_id, chunk in self.with_chunk_ids(source, self.iter_chunks(path)):
+                    ids.append(chunk_id)
+                    if chunk_id not in old_ids:
+                        yield chunk_id, chunk
+                    else:
+                        reused.append((chunk_id, chunk.metadata))
+
+            added = self.embed_and_store(new_chunks())
+            self._update_metadata(reused)
+            stale_ids = list(old_ids - set(ids))
+            if stale_ids:
+                self._delete_chunks(stale_ids)
+
+            tracked[source] = {"sha256": content_hash, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                               "chunk_ids": ids}
+            stats["files_changed"] += 1
+            stats["chunks_added"] += added
+            stats["chunks_deleted"] += len(stale_ids)
+            stats["embeddings_skipped"] += len(ids) - added
+
+        self._save_manifest()
+        return stats
 
 
 # =================================================================
 # RAG SYSTEM AND TOOL
 # =================================================================
 
+class HybridRetriever(BaseRetriever):
+    """
+    Fuses BM25 and vector search with reciprocal-rank fusion: each chunk scores
+    sum(1 / (rrf_k + rank)) over the rankings it appears in. Exact terms such as
+    candidate names are found by BM25 even when the embedding match is weak.
+    """
+    vector_store: Any
+    bm25: BM25Index
+    embedding_function: Any
+    k: int = RETRIEVAL_K
+    fetch_k: int = RETRIEVAL_FETCH_K
+    rrf_k: int = RRF_K
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        collection = self.vector_store._collection
+        dense = collection.query(
+            query_embeddings=[self.embedding_function.embed_query(query)],
+            n_results=self.fetch_k,
+            include=["documents", "metadatas"],
+        )
+        found = {
+            chunk_id: Document(page_content=text, metadata=metadata or {})
+            for chunk_id, text, metadata in zip(dense["ids"][0], dense["documents"][0], dense["metadatas"][0])
+        }
+        rankings = [dense["ids"][0], [chunk_id for chunk_id, _ in self.bm25.search(query, self.fetch_k)]]
+
+        scores = {}
+        for ranking in rankings:
+            for rank, chunk_id in enumerate(ranking, start=1):
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (self.rrf_k + rank)
+        top_ids = sorted(scores, key=scores.get, reverse=True)[:self.k]
+
+        missing = [chunk_id for chunk_id in top_ids if chunk_id not in found]
+        if missing:
+            sparse = collection.get(ids=missing, include=["documents", "metadatas"])
+            for chunk_id, text, metadata in zip(sparse["ids"], sparse["documents"], sparse["metadatas"]):
+                found[chunk_id] = Document(page_content=text, metadata=metadata or {})
+        return [found[chunk_id] for chunk_id in top_ids if chunk_id in found]
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _text_overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of `left` that is also a prefix of `right`."""
+    for size in range(min(len(left), len(right), CHUNK_OVERLAP), MIN_MERGE_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def pack_context(documents: list, token_budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """
+    Turns retrieved chunks into prompt context: chunks from the same page that overlap
+    (CHUNK_OVERLAP makes neighbours share text) are merged, duplicates are dropped, and
+    the resulting blocks are added in relevance order until `token_budget` is reached.
+    """
+    def position(item):
+        rank, doc = item
+        start = doc.metadata.get("start_index")
+        return (str(doc.metadata.get("source", "")), doc.metadata.get("page", -1),
+                start if start is not None else rank)
+
+    blocks = []  # [text, best rank, source, page, end offset]
+    for rank, doc in sorted(enumerate(documents), key=position):
+        text = doc.page_content
+        source, page = doc.metadata.get("source"), doc.metadata.get("page")
+        start = doc.metadata.get("start_index")
+        last = blocks[-1] if blocks else None
+        if last is not None and (last[2], last[3]) == (source, page):
+            if text in last[0]:
+                last[1] = min(last[1], rank)
+                continue
+            if start is not None and last[4] is not None and start <= last[4]:
+                overlap = last[4] - start
+            else:
+                overlap = _text_overlap(last[0], text)
+            if overlap:
+                last[0] += text[overlap:]
+                last[1] = min(last[1], rank)
+                last[4] = start + len(text) if start is not None else None
+                continue
+            # Without offsets the order within a page is unknown, so also try the other side
+            overlap = _text_overlap(text, last[0]) if start is None else 0
+            if overlap:
+                last[0] = text + last[0][overlap:]
+                last[1] = min(last[1], rank)
+                continue
+        blocks.append([text, rank, source, page, start + len(text) if start is not None else None])
+
+    packed, used = [], 0
+    for text, *_ in sorted(blocks, key=lambda block: block[1]):
+        remaining = token_budget - used
+        if remaining <= 0:
+            break
+        if estimate_tokens(text) > remaining:
+            text = text[:remaining * CHARS_PER_TOKEN]
+        packed.append(text)
+        used += estimate_tokens(text)
+
+    raw_tokens = sum(estimate_tokens(doc.page_content) for doc in documents)
+    print(f"[RAG System] Context: {len(documents)} chunks -> {len(packed)} blocks, "
+          f"~{used} tokens (raw ~{raw_tokens})")
+    return "\n\n---\n\n".join(packed)
+
+
+class SemanticAnswerCache:
+    """
+    Remembers RAG answers by question embedding. A new question whose embedding has
+    cosine similarity >= `threshold` with a stored one gets the stored answer.
+    Least recently used entries are evicted beyond `max_entries`, and entries expire
+    after `ttl` seconds.
+    """
+
+    def __init__(self, threshold: float = ANSWER_CACHE_THRESHOLD, max_entries: int = ANSWER_CACHE_SIZE,
+                 ttl: float = ANSWER_CACHE_TTL):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # question -> (unit vector, answer, created)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vector):
+        import numpy as np
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, vector):
+        import numpy as np
+        query = self._unit(vector)
+        now = time.monotonic()
+        with self._lock:
+            for question in [q for q, (_, _, created) in self._entries.items() if now - created > self.ttl]:
+                del self._entries[question]
+
+            best_question, best_score = None, -1.0
+            for question, (unit, _, _) in self._entries.items():
+                score = float(np.dot(query, unit))
+                if score > best_score:
+                    best_question, best_score = question, score
+
+            if best_question is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_question)
+            self.hits += 1
+            return self._entries[best_question][1]
+
+    def store(self, question: str, vector, answer: str):
+        with self._lock:
+            self._entries[question] = (self._unit(vector), answer, time.monotonic())
+            self._entries.move_to_end(question)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
 class RAGSystem:
-    def __init__(self, pdf_path: str, persist_directory: str, llm):
+    def __init__(self, pdf_path: str, persist_directory: str, llm, workers: int = EXTRACT_WORKERS):
+        # pdf_path may be a single PDF or a directory of PDFs (e.g. ./data)
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF file not found at: {pdf_path}")
 
         self.pdf_path = pdf_path
         self.persist_directory = persist_directory
+        self.workers = workers
         self.llm = llm                                      # ← injected, not hardcoded
-        self.embedding_function = OllamaEmbeddings(model="nomic-embed-text")
+        from langchain_ollama import OllamaEmbeddings
+        self.embedding_function = CachedEmbeddings(OllamaEmbeddings(model=EMBEDDING_MODEL), EMBEDDING_MODEL)
+        self.answer_cache = SemanticAnswerCache()
         self.vector_store = self._prepare_vector_store()
         self.rag_chain = self._build_rag_chain()
 
     def _prepare_vector_store(self):
-        if os.path.exists(self.persist_directory):
-            print(f"Loading existing vector store from '{self.persist_directory}'...")
-            return Chroma(
-                persist_directory=self.persist_directory,
-                embedding_function=self.embedding_function
-            )
-        else:
-            print(f"Creating new vector store from '{self.pdf_path}'...")
-            loader = PyPDFLoader(self.pdf_path)
-            documents = loader.load()
-            text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-            chunks = text_splitter.split_documents(documents)
-            vectorstore = Chroma.from_documents(
-                documents=chunks,
-                embedding=self.embedding_function,
-                persist_directory=self.persist_directory
-            )
-            print("Vector store created successfully.")
-            return vectorstore
+        print(f"Syncing vector store '{self.persist_directory}' with '{self.pdf_path}'...")
+        from langchain_community.vectorstores import Chroma
+        vectorstore = Chroma(
+            persist_directory=self.persist_directory,
+            embedding_function=self.embedding_function
+        )
+        self.ingestor = DocumentIngestor(
+            vectorstore, self.embedding_function, os.path.join(self.persist_directory, INGEST_MANIFEST_FILE),
+            workers=self.workers
+        )
+        self.sync_documents()
+        return vectorstore
+
+    def sync_documents(self) -> dict:
+        """Re-ingests new or changed PDFs; cached answers are dropped if the store changed."""
+        self.ingest_stats = self.ingestor.sync(list_pdf_documents(self.pdf_path))
+        if self.ingest_stats["files_changed"] or self.ingest_stats["files_removed"]:
+            self.answer_cache.clear()
+        print(
+            f"Vector store ready: {self.ingest_stats['files_scanned']} file(s) scanned, "
+            f"{self.ingest_stats['files_changed']} changed, {self.ingest_stats['files_removed']} removed, "
+            f"{self.ingest_stats['chunks_added']} chunks embedded, {self.ingest_stats['chunks_deleted']} deleted, "
+            f"{self.ingest_stats['embeddings_skipped']} embedding calls skipped."
+        )
+        print(f"Embedding cache: {self.embedding_function.hits} hits, {self.embedding_function.misses} misses.")
+        return self.ingest_stats
 
     def _build_rag_chain(self):
-        retriever = self.vector_store.as_retriever(search_kwargs={'k': 3})
+        retriever = HybridRetriever(
+            vector_store=self.vector_store,
+            bm25=self.ingestor.bm25,
+            embedding_function=self.embedding_function,
+        )
 
         template = """
         You are an assistant for question-answering tasks.
@@ -151,7 +969,7 @@ class RAGSystem:
         prompt = ChatPromptTemplate.from_template(template)
 
         chain = (
-            {"context": retriever, "question": RunnablePassthrough()}
+            {"context": retriever | RunnableLambda(pack_context), "question": RunnablePassthrough()}
             | prompt
             | self.llm                                      # ← uses injected LLM
             | StrOutputParser()
@@ -160,7 +978,25 @@ class RAGSystem:
 
     def query(self, question: str) -> str:
         print(f"\n[RAG System] Querying with: '{question}'")
-        return self.rag_chain.invoke(question)
+        vector = self.embedding_function.embed_query(question)
+        answer = self.answer_cache.lookup(vector)
+        if answer is None:
+            answer = self.rag_chain.invoke(question)
+            self.answer_cache.store(question, vector, answer)
+        else:
+            print("[RAG System] Answer served from the semantic cache.")
+        return answer
+
+    async def aquery(self, question: str) -> str:
+        print(f"\n[RAG System] Querying with: '{question}'")
+        vector = await self.embedding_function.aembed_query(question)
+        answer = self.answer_cache.lookup(vector)
+        if answer is None:
+            answer = await self.rag_chain.ainvoke(question)
+            self.answer_cache.store(question, vector, answer)
+        else:
+            print("[RAG System] Answer served from the semantic cache.")
+        return answer
 
 
 class RAGToolInput(BaseModel):
@@ -173,7 +1009,8 @@ class RAGTool(BaseTool):
         "Use this tool ONLY when you need to answer questions about the contents of the local document."
     )
     args_schema: Type[BaseModel] = RAGToolInput
-    rag_system: RAGSystem
+    rag_system: Any   # a RAGSystem, or anything with query/aquery (e.g. a stub)
+    guard: Optional[ToolCallGuard] = None
 
     class Config:
         arbitrary_types_allowed = True
@@ -181,22 +1018,298 @@ class RAGTool(BaseTool):
     def _run(self, query: str) -> str:
         return self.rag_system.query(query)
 
+    async def _arun(self, query: str) -> str:
+        if self.guard is None:
+            return await self.rag_system.aquery(query)
+        return await self.guard.run(self.name, self.rag_system.aquery(query))
+
 
 # =================================================================
 # FastMCPTool 
 # =================================================================
 
+class MCPHttpSession:
+    """
+    Pooled keep-alive HTTP connections to the MCP server, shared by every FastMCPTool.
+
+    `get` uses a requests.Session, `aget` an httpx.AsyncClient created on first use
+    (it stays bound to the event loop it was created in). Both retry failed connects only.
+    """
+
+    def __init__(self, pool_size: int = HTTP_POOL_SIZE, timeout: float = HTTP_TIMEOUT, retries: int = HTTP_RETRIES):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+
+        self.session = requests.Session()
+        # Only failed connects are retried: put_SQL_insert is a GET that writes, and a
+        # read timeout or 5xx may arrive after the statement already ran on the server
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=0,
+            other=0,
+            backoff_factor=0.3,
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._async_client = None
+
+    def get(self, url: str, params: dict) -> requests.Response:
+        return self.session.get(url, params=params, timeout=self.timeout)
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                transport=httpx.AsyncHTTPTransport(retries=self.retries),
+            )
+        return self._async_client
+
+    async def aget(self, url: str, params: dict) -> httpx.Response:
+        return await self._get_async_client().get(url, params=params)
+
+    async def apost(self, url: str, payload) -> httpx.Response:
+        return await self._get_async_client().post(url, json=payload)
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def close(self):
+        self.session.close()
+
+
+async def acall_mcp_endpoint(http: MCPHttpSession, function_name: str, query: str) -> str:
+    """Calls one MCP server endpoint and returns its JSON result as a string."""
+    try:
+        endpoint_url = f"{SERVER_URL}/{function_name}"
+        params = {'myParam': query.strip()}
+        response = await http.aget(endpoint_url, params=params)
+        response.raise_for_status()
+        return json.dumps(response.json())
+    except httpx.HTTPError as e:
+        return f"Network error calling function {function_name}: {e}"
+    except Exception as e:
+        return f"An unexpected error occurred: {e}"
+
+
+class MCPBatcher:
+    """
+    Collects the MCP tool calls the agent makes in one step and sends them to the
+    server's /batch endpoint in a single round-trip. A lone call goes out as a plain
+    GET. The calls are sent individually only if the batch never reached the server
+    (connect failure) or the server has no /batch; other failures are reported per call.
+    """
+
+    def __init__(self, http: MCPHttpSession, window: float = BATCH_WINDOW):
+        self.http = http
+        self.window = window
+        self._pending = []  # (function_name, query, future)
+        self._flush_task = None
+
+    async def call(self, function_name: str, query: str) -> str:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((function_name, query, future))
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_window())
+        return await future
+
+    async def _flush_after_window(self):
+        await asyncio.sleep(self.window)
+        pending, self._pending = self._pending, []
+        self._flush_task = None
+        try:
+            if len(pending) == 1:
+                function_name, query, _ = pending[0]
+                results = [await acall_mcp_endpoint(self.http, function_name, query)]
+            else:
+                results = await self._send_batch(pending)
+        except Exception as e:
+            results = [f"An unexpected error occurred: {e}"] * len(pending)
+
+        for (_, _, future), result in zip(pending, results):
+            if not future.done():  # the caller may have timed out meanwhile
+                future.set_result(result)
+
+    async def _send_batch(self, pending: list) -> list:
+        payload = [{"tool": function_name, "param": query.strip()} for function_name, query, _ in pending]
+        try:
+            response = await self.http.apost(f"{SERVER_URL}/batch", payload)
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            # The batch never reached the server, so sending the calls one by one is safe
+            return await self._send_each(pending)
+        except httpx.HTTPError as e:
+            # The server may have run the batch already; re-sending could apply a put_SQL_insert twice
+            return [f"Network error calling function {function_name}: {e}" for function_name, _, _ in pending]
+        if response.status_code in (404, 405):
+            return await self._send_each(pending)   # a server without /batch
+        try:
+            response.raise_for_status()
+            items = response.json()["results"]
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            return [f"Error calling function {function_name} (batch): {e}" for function_name, _, _ in pending]
+
+        results = []
+        for item in items:
+            if item["status_code"] == 200:
+                results.append(json.dumps(item["result"]))
+            else:
+                results.append(f"Error calling function {item['tool']} ({item['status_code']}): {item['error']}")
+        return results
+
+    async def _send_each(self, pending: list) -> list:
+        return await asyncio.gather(
+            *(acall_mcp_endpoint(self.http, function_name, query) for function_name, query, _ in pending)
+        )
+
+
+class ToolResultCache:
+    """
+    Caches MCP tool results by (function_name, normalized query), with a freshness
+    policy per tool from TOOL_CACHE_TTL. Calling a tool listed in TOOL_CACHE_INVALIDATES
+    drops the cached results of the tools it names, and a read still in flight during
+    that call is not stored. Error results are never cached.
+    """
+
+    def __init__(self, ttl: dict = None, invalidates: dict = None, max_entries: int = TOOL_CACHE_SIZE):
+        self.ttl = {**TOOL_CACHE_TTL, **(ttl or {})}
+        self.invalidates = {**TOOL_CACHE_INVALIDATES, **(invalidates or {})}
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (function_name, query) -> (result, created)
+        self._generations = {}         # function_name -> invalidation count
+        self._lock = threading.Lock()
+        # hit/miss counts of the current turn, per context like ToolCallGuard's timings
+        self._turn = contextvars.ContextVar("tool_cache_turn", default=None)
+
+    SQL_LITERAL = re.compile(r"('(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\")")
+
+    @classmethod
+    def normalize(cls, function_name: str, query: str) -> str:
+        if function_name in TOOL_CACHE_SQL:
+            # Same rule as the server's normalize_sql: collapse whitespace outside literals only
+            parts = cls.SQL_LITERAL.split(query.strip())
+            return "".join(part if i % 2 else " ".join(part.split()) for i, part in enumerate(parts))
+        query = " ".join(query.split())
+        return query.casefold() if function_name in TOOL_CACHE_CASE_INSENSITIVE else query
+
+    @staticmethod
+    def is_cacheable_result(result: str) -> bool:
+        # Failed calls come back as plain text, failed SQL as a JSON "Error: ..." string
+        try:
+            json.loads(result)
+        except ValueError:
+            return False
+        return "Error:" not in result
+
+    def _lookup(self, function_name: str, query: str):
+        """Returns (cached result or None, generation at lookup) and counts the hit or miss."""
+        key = (function_name, self.normalize(function_name, query))
+        ttl = self.ttl[function_name]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and ttl is not None and time.monotonic() - entry[1] > ttl:
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            generation = self._generations.get(function_name, 0)
+        turn = self._turn.get()
+        if turn is not None:
+            turn["hits" if entry is not None else "misses"] += 1
+        return (entry[0] if entry is not None else None), generation
+
+    def _store(self, function_name: str, query: str, result: str, generation: int):
+        if not self.is_cacheable_result(result):
+            return
+        key = (function_name, self.normalize(function_name, query))
+        with self._lock:
+            if self._generations.get(function_name, 0) != generation:
+                return  # invalidated while the call was running
+            self._entries[key] = (result, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _invalidate_for(self, function_name: str):
+        targets = self.invalidates.get(function_name, ())
+        if not targets:
+            return
+        with self._lock:
+            for target in targets:
+                self._generations[target] = self._generations.get(target, 0) + 1
+            for key in [key for key in self._entries if key[0] in targets]:
+                del self._entries[key]
+
+    async def acall(self, function_name: str, query: str, call) -> str:
+        """Returns the cached result, or awaits `call()` and caches it per the tool's policy."""
+        if self.ttl.get(function_name, 0) == 0:
+            try:
+                return await call()
+            finally:
+                self._invalidate_for(function_name)   # also after a failed write
+        result, generation = self._lookup(function_name, query)
+        if result is None:
+            result = await call()
+            self._store(function_name, query, result, generation)
+        return result
+
+    def call(self, function_name: str, query: str, call) -> str:
+        """Synchronous twin of `acall`."""
+        if self.ttl.get(function_name, 0) == 0:
+            try:
+                return call()
+            finally:
+                self._invalidate_for(function_name)
+        result, generation = self._lookup(function_name, query)
+        if result is None:
+            result = call()
+            self._store(function_name, query, result, generation)
+        return result
+
+    def reset(self):
+        """Starts counting hits and misses for a new turn in the current context."""
+        self._turn.set({"hits": 0, "misses": 0})
+
+    def turn_summary(self) -> dict:
+        return self._turn.get() or {"hits": 0, "misses": 0}
+
+
 class FastMCPTool(BaseTool):
     """A LangChain tool that calls the MCP server API."""
     name: str = Field()
     description: str = Field()
     function_name: str = Field()
+    http: MCPHttpSession
+    guard: Optional[ToolCallGuard] = None
+    batcher: Optional[MCPBatcher] = None
+    result_cache: Optional[ToolResultCache] = None
+
+    class Config:
+        arbitrary_types_allowed = True
 
     def _run(self, query: str) -> str:
+        if self.result_cache is None:
+            return self._get(query)
+        return self.result_cache.call(self.function_name, query, lambda: self._get(query))
+
+    def _get(self, query: str) -> str:
         try:
             endpoint_url = f"{SERVER_URL}/{self.function_name}"
             params = {'myParam': query.strip()}
-            response = requests.get(endpoint_url, params=params)
+            response = self.http.get(endpoint_url, params=params)
             response.raise_for_status()
             return json.dumps(response.json())
         except requests.exceptions.RequestException as e:
@@ -204,11 +1317,183 @@ class FastMCPTool(BaseTool):
         except Exception as e:
             return f"An unexpected error occurred: {e}"
 
+    async def _arun(self, query: str) -> str:
+        # Cache hits return before the guard, so they take no concurrency slot or timing
+        if self.result_cache is None:
+            return await self._guarded_call(query)
+        return await self.result_cache.acall(self.function_name, query, lambda: self._guarded_call(query))
+
+    async def _guarded_call(self, query: str) -> str:
+        if self.guard is None:
+            return await self._call_server(query)
+        return await self.guard.run(self.name, self._call_server(query))
+
+    async def _call_server(self, query: str) -> str:
+        if self.batcher is not None:
+            return await self.batcher.call(self.function_name, query)
+        return await acall_mcp_endpoint(self.http, self.function_name, query)
+
 
 # =================================================================
 # Main Client Application
 # =================================================================
 
+def message_text(content) -> str:
+    """Text of a message or chunk; Anthropic models send a list of content blocks."""
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+
+
+class _ReplyReset(str):
+    pass
+
+
+# Yielded by astream_chat when text already streamed came from an agent step that then
+# called tools (e.g. "I'll check the weather..."): consumers drop the reply so far.
+# It is an empty string, so plain "".join() consumers are unaffected.
+REPLY_RESET = _ReplyReset()
+
+
+class ThinkStripper:
+    """
+    Incrementally removes a leading <think>...</think> block from streamed text, so
+    tokens can be shown as they arrive instead of cleaning the full answer afterwards.
+    """
+    OPEN, CLOSE = "<think>", "</think>"
+
+    def __init__(self):
+        self.state = "start"   # start -> thinking -> answer
+        self.buffer = ""
+        self.leading = True    # whitespace before the first visible character is dropped
+
+    def feed(self, text: str) -> str:
+        return self._trim(self._feed(text))
+
+    def _trim(self, visible: str) -> str:
+        if self.leading and visible:
+            visible = visible.lstrip()
+            self.leading = not visible
+        return visible
+
+    def _feed(self, text: str) -> str:
+        if self.state == "answer":
+            return text
+        self.buffer += text
+        if self.state == "start":
+            head = self.buffer.lstrip()
+            if head.startswith(self.OPEN):
+                self.state = "thinking"
+                self.buffer = head[len(self.OPEN):]
+            elif self.OPEN.startswith(head):
+                return ""  # could still become "<think>"
+            else:
+                self.state = "answer"
+                visible, self.buffer = self.buffer, ""
+                return visible
+        if self.state == "thinking":
+            end = self.buffer.find(self.CLOSE)
+            if end == -1:
+                # keep just enough to spot a closing tag split across chunks
+                self.buffer = self.buffer[-(len(self.CLOSE) - 1):]
+                return ""
+            self.state = "answer"
+            visible, self.buffer = self.buffer[end + len(self.CLOSE):], ""
+            return visible
+        return ""
+
+    def flush(self) -> str:
+        """Text held back at the end of a message that turned out not to be a <think> tag."""
+        visible = self.buffer if self.state == "start" else ""
+        self.buffer = ""
+        return self._trim(visible)
+
+
+def strip_think(text: str) -> str:
+    stripper = ThinkStripper()
+    return (stripper.feed(text) + stripper.flush()).strip()
+
+
+class ChatHistoryManager:
+    """
+    Bounded conversation memory. The last `keep_turns` turns (and no more than
+    `token_budget` estimated tokens of them) are resent verbatim; older turns are folded
+    into a rolling summary by the LLM in the background, between turns. Tool results
+    of a turn are kept only as short trimmed notes.
+    """
+
+    def __init__(self, llm, keep_turns: int = HISTORY_KEEP_TURNS, token_budget: int = HISTORY_TOKEN_BUDGET):
+        self.llm = llm
+        self.keep_turns = keep_turns
+        self.token_budget = token_budget
+        self.turns = []      # {"user": str, "assistant": str}
+        self.summary = ""
+        self._summary_task = None
+
+    @staticmethod
+    def compact_observation(tool_name: str, content) -> str:
+        text = " ".join(message_text(content).split())
+        if len(text) > TOOL_OBSERVATION_CHARS:
+            text = text[:TOOL_OBSERVATION_CHARS] + "..."
+        return f"{tool_name}: {text}"
+
+    def messages(self) -> list:
+        messages = []
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"})
+        for turn in self.turns:
+            messages.append({"role": "user", "content": turn["user"]})
+            messages.append({"role": "assistant", "content": turn["assistant"]})
+        return messages
+
+    def prompt_tokens(self) -> int:
+        return sum(estimate_tokens(message["content"]) for message in self.messages())
+
+    def _turn_tokens(self) -> int:
+        return sum(estimate_tokens(turn["user"]) + estimate_tokens(turn["assistant"]) for turn in self.turns)
+
+    async def ready(self):
+        """Waits for a summary still being written after the previous turn."""
+        if self._summary_task is not None:
+            await self._summary_task
+            self._summary_task = None
+
+    def add_turn(self, user: str, assistant: str, observations: list):
+        assistant = strip_think(message_text(assistant))
+        if observations:
+            assistant += "\n\n[Tool results: " + " | ".join(observations) + "]"
+        self.turns.append({"user": user, "assistant": assistant})
+
+        evicted = []
+        while len(self.turns) > self.keep_turns or (len(self.turns) > 1 and self._turn_tokens() > self.token_budget):
+            evicted.append(self.turns.pop(0))
+        if evicted:
+            self._summary_task = asyncio.create_task(self._fold(evicted))
+
+    async def _fold(self, evicted: list):
+        transcript = "\n".join(f"User: {turn['user']}\nAssistant: {turn['assistant']}" for turn in evicted)
+        prompt = (
+            "Update the running summary of a conversation between a user and an assistant.\n"
+            "Keep names, numbers, dates and decisions; drop small talk. Answer with the summary only.\n\n"
+            f"Current summary:\n{self.summary or '(empty)'}\n\nNew turns:\n{transcript}"
+        )
+        try:
+            result = await self.llm.ainvoke(prompt)
+            self.summary = strip_think(message_text(result.content))
+        except Exception as e:
+            print(f"[History] Could not summarize older turns ({e}); keeping them trimmed.")
+            self.summary = (self.summary + "\n" + transcript)[-self.token_budget * CHARS_PER_TOKEN:]
+
+
+class ChatSession:
+    """Per-user conversation state; the LLM, agent, tools and vector store are shared."""
+
+    def __init__(self, llm):
+        self.history = ChatHistoryManager(llm)
+        self.lock = asyncio.Lock()   # one turn at a time per session
+        self.last_used = time.monotonic()
+
+
 class FastMCPLangChainClient:
     def __init__(
         self,
@@ -217,30 +1502,130 @@ class FastMCPLangChainClient:
         api_key: str = None,
         model: str = None,
         show_thinking: bool = False,
+        http_pool_size: int = HTTP_POOL_SIZE,
+        http_timeout: float = HTTP_TIMEOUT,
+        http_retries: int = HTTP_RETRIES,
+        tool_concurrency: dict = None,
+        tool_timeouts: dict = None,
+        batch_tool_calls: bool = False,
+        extract_workers: int = EXTRACT_WORKERS,
+        cache_tool_results: bool = True,
+        tool_cache_ttl: dict = None,
+        prompt_caching: bool = False,
+        llm=None,
+        rag_system=None,
+        probe_server: bool = True,
     ):
+        # `llm` and `rag_system` replace the models and vector store built here, and
+        # probe_server=False skips the tool server check, so the client (prompt caching
+        # included) can run against a mocked chat model without Ollama, Chroma or the server.
         self.provider = provider
         self.api_key = api_key
         self.model = model
         self.show_thinking = show_thinking
         self.agent_executor = None
-        self.chat_history = []
-
-        # Build one shared LLM instance for both RAG and the agent
-        self.llm = get_llm(
-            provider=provider,
-            api_key=api_key,
-            model=model,
-            temperature=0.1
-        )
+        if prompt_caching and provider != "anthropic":
+            print("[LLM Factory] Prompt caching is only available with --provider anthropic; ignoring it.")
+        self.prompt_caching = prompt_caching and provider == "anthropic"
+        self.sessions = {}    # session id -> ChatSession, created on first message
+
+        # One keep-alive connection pool to SERVER_URL for all MCP tool calls
+        self.http = MCPHttpSession(pool_size=http_pool_size, timeout=http_timeout, retries=http_retries)
+
+        # Optionally send the MCP tool calls of one agent step as a single /batch request
+        self.batcher = MCPBatcher(self.http) if batch_tool_calls else None
+
+        # Limits and timings for tool calls the agent fans out in parallel
+        self.tool_guard = ToolCallGuard(concurrency=tool_concurrency, timeouts=tool_timeouts)
+
+        # Repeated tool calls (small models repeat themselves a lot) are answered from a cache
+        self.tool_cache = ToolResultCache(ttl=tool_cache_ttl) if cache_tool_results else None
+
+        # The agent runs on one long-lived event loop so LangGraph can await tool calls
+        # concurrently and the async HTTP client keeps its connections between turns.
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, name="little-mcp-agent", daemon=True)
+        self._loop_thread.start()
+
+        # Independent startup stages run concurrently. The Ollama warm-up keeps running in
+        # the background after startup, so the first question finds the model loaded.
+        self.startup_timings = {}
+        self.server_status = "unknown"
+        startup_start = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="little-mcp-startup")
+
+        # Build one shared LLM instance for both RAG and the agent (or use the one passed in)
+        if llm is not None:
+            llm_future = executor.submit(lambda: llm)
+        else:
+            llm_future = executor.submit(
+                self._timed, "llm", get_llm, provider=provider, api_key=api_key, model=model, temperature=0.1
+            )
+        if provider == "ollama" and llm is None:
+            # A daemon thread: executor workers are joined at exit, which would make quitting wait for it
+            threading.Thread(
+                target=self._timed, args=("ollama warm-up", self._warm_up_ollama, model or DEFAULT_OLLAMA_MODEL),
+                name="little-mcp-warm-up", daemon=True
+            ).start()
+        server_future = executor.submit(self._timed, "tool server", self._check_tool_server) if probe_server else None
+        executor.submit(self._timed, "agent imports", importlib.import_module, "langgraph.prebuilt")
 
         print(f"\nInitializing RAG System (Thinking Mode: {'ON' if show_thinking else 'OFF'})...")
-        self.rag_system = RAGSystem(
-            pdf_path=pdf_path,
-            persist_directory=CHROMA_DB_PATH,
-            llm=self.llm                                    # ← share the same LLM
-        )
+        if rag_system is not None:
+            rag_future = executor.submit(lambda: rag_system)
+        else:
+            rag_future = executor.submit(
+                self._timed, "vector store",
+                lambda: RAGSystem(
+                    pdf_path=pdf_path,
+                    persist_directory=CHROMA_DB_PATH,
+                    llm=llm_future.result(),                    # ← share the same LLM
+                    workers=extract_workers
+                )
+            )
+        self.llm = llm_future.result()
+        self.rag_system = rag_future.result()
+        if server_future is not None:
+            server_future.result()
+        executor.shutdown(wait=False)
+        self.startup_timings["total"] = time.perf_counter() - startup_start
         print("RAG System ready.")
 
+    def _timed(self, stage: str, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.startup_timings[stage] = time.perf_counter() - start
+
+    def _warm_up_ollama(self, model: str):
+        """Asks Ollama to load the chat and embedding models now and keep them loaded."""
+        try:
+            requests.post(f"{OLLAMA_URL}/api/generate",
+                          json={"model": model, "prompt": "", "keep_alive": OLLAMA_KEEP_ALIVE},
+                          timeout=OLLAMA_WARMUP_TIMEOUT)
+            requests.post(f"{OLLAMA_URL}/api/embed",
+                          json={"model": EMBEDDING_MODEL, "input": "warm-up", "keep_alive": OLLAMA_KEEP_ALIVE},
+                          timeout=OLLAMA_WARMUP_TIMEOUT)
+        except requests.exceptions.RequestException as e:
+            print(f"[Startup] Ollama warm-up failed: {e}")
+
+    def _check_tool_server(self):
+        try:
+            response = self.http.get(f"{SERVER_URL}/", params={})
+            self.server_status = "up" if response.ok else f"HTTP {response.status_code}"
+        except requests.exceptions.RequestException:
+            self.server_status = "unreachable"
+
+    def startup_report(self) -> str:
+        """One line per banner: total startup time and the slowest stages first."""
+        # a snapshot: the background warm-up may still add its timing
+        stages = {name: secs for name, secs in dict(self.startup_timings).items() if name != "total"}
+        parts = [f"{name} {secs:.1f}s" for name, secs in sorted(stages.items(), key=lambda item: item[1], reverse=True)]
+        if self.provider == "ollama" and "ollama warm-up" not in stages:
+            parts.append("ollama warm-up in background")
+        return f"{self.startup_timings.get('total', 0.0):.1f}s ({' | '.join(parts)})"
+
     def initialize(self):
         """Initialize the LangChain agent with MCP tools + RAG tool."""
         mcp_tools_config = [
@@ -284,60 +1669,218 @@ class FastMCPLangChainClient:
             }
         ]
 
-        langchain_tools = [FastMCPTool(**config) for config in mcp_tools_config]
-        langchain_tools.append(RAGTool(rag_system=self.rag_system))
+        langchain_tools = [
+            FastMCPTool(http=self.http, guard=self.tool_guard, batcher=self.batcher, result_cache=self.tool_cache, **config)
+            for config in mcp_tools_config
+        ]
+        langchain_tools.append(RAGTool(rag_system=self.rag_system, guard=self.tool_guard))
 
         # Agent uses the same shared LLM
-        self.agent_executor = create_react_agent(self.llm, langchain_tools)
+        from langgraph.prebuilt import create_react_agent
+        agent_llm = self.llm
+        if self.prompt_caching:
+            # Bound up front so the tool schemas carry a cache breakpoint; LangGraph keeps this binding
+            agent_llm = self.llm.bind_tools(cacheable_tool_schemas(langchain_tools))
+        self.agent_executor = create_react_agent(agent_llm, langchain_tools)
 
         print("\nFastMCP LangChain Client initialized successfully!")
         print("Tools available:", [tool.name for tool in langchain_tools])
 
-    def chat(self, message: str) -> str:
+    def _run_async(self, coro):
+        """Runs a coroutine on the client's event loop and waits for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def _get_session(self, session_id: str) -> ChatSession:
+        """Returns the session's state, evicting idle sessions and, past MAX_SESSIONS, the least recent one."""
+        now = time.monotonic()
+        for idle_id in [sid for sid, session in self.sessions.items()
+                        if now - session.last_used > SESSION_IDLE_TIMEOUT and not session.lock.locked()]:
+            del self.sessions[idle_id]
+
+        session = self.sessions.get(session_id)
+        if session is None:
+            if len(self.sessions) >= MAX_SESSIONS:
+                idle = [sid for sid, s in self.sessions.items() if not s.lock.locked()]
+                if idle:
+                    del self.sessions[min(idle, key=lambda sid: self.sessions[sid].last_used)]
+            session = self.sessions[session_id] = ChatSession(self.llm)
+        session.last_used = now
+        return session
+
+    def chat(self, message: str, session_id: str = DEFAULT_SESSION) -> str:
+        return self._run_async(self.achat(message, session_id))
+
+    async def achat(self, message: str, session_id: str = DEFAULT_SESSION) -> str:
+        parts = []
+        async for delta in self.astream_chat(message, session_id):
+            if delta is REPLY_RESET:
+                parts.clear()
+            else:
+                parts.append(delta)
+        return "".join(parts)
+
+    def stream_chat(self, message: str, session_id: str = DEFAULT_SESSION):
+        """Synchronous generator over astream_chat, for the terminal loop and the Gradio callback."""
+        deltas = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for delta in self.astream_chat(message, session_id):
+                    deltas.put(delta)
+            except Exception as e:
+                deltas.put(f"Error processing message: {str(e)}")
+            finally:
+                deltas.put(done)
+
+        asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        while True:
+            delta = deltas.get()
+            if delta is done:
+                return
+            yield delta
+
+    async def astream_chat(self, message: str, session_id: str = DEFAULT_SESSION):
+        """
+        Runs one agent turn in the given session and yields the visible text of the answer
+        token by token, with <think> blocks stripped as they stream. Text of a step that ends
+        in tool calls is retracted with REPLY_RESET. Tool steps are printed in thinking mode.
+        """
         if not self.agent_executor:
             raise RuntimeError("Client not initialized. Call initialize() first.")
 
+        session = self._get_session(session_id)
+        async with session.lock:
+            async for delta in self._astream_turn(message, session.history):
+                yield delta
+            session.last_used = time.monotonic()
+
+    async def _astream_turn(self, message: str, history: ChatHistoryManager):
+        await history.ready()
+        messages = history.messages()
+        messages.append({"role": "user", "content": message})
+        conversation_tokens = history.prompt_tokens() + estimate_tokens(message)
+        verbatim_turns = len(history.turns)
+        if self.prompt_caching:
+            messages = mark_cacheable(messages)
+
+        final_response = ""
+        input_tokens = None
+        observations = []
+        model_messages = []
+        self.tool_guard.reset()
+        if self.tool_cache is not None:
+            self.tool_cache.reset()
+
+        # --- THINKING MODE header ---
+        if self.show_thinking:
+            print("\n" + "─" * 30 + " 易 THINKING PROCESS " + "─" * 30)
+
+        seen = len(messages)
+        stripper = ThinkStripper()
+        current_message_id = None
+        tool_step = False      # the current agent message turned out to call tools
+        streamed = False       # text of the current agent message was already yielded
         try:
-            messages = list(self.chat_history)
-            messages.append({"role": "user", "content": message})
-
-            final_response = ""
-
-            # --- THINKING MODE (stream) ---
-            if self.show_thinking:
-                print("\n" + "─" * 30 + " 易 THINKING PROCESS " + "─" * 30)
-
-                for event in self.agent_executor.stream({"messages": messages}, stream_mode="values"):
-                    current_message = event["messages"][-1]
-
-                    if hasattr(current_message, 'tool_calls') and current_message.tool_calls:
-                        for tool in current_message.tool_calls:
-                            print(f"\n Thought: I need to use tool '{tool['name']}'")
-                            print(f"   Args: {tool['args']}")
-
-                    elif current_message.type == 'tool':
-                        preview = current_message.content[:200] + "..." if len(current_message.content) > 200 else current_message.content
-                        print(f"\n Observation ({current_message.name}):")
-                        print(f"   {preview}")
-
-                    elif current_message.type == 'ai' and not current_message.tool_calls:
-                        final_response = current_message.content
-
-                print("─" * 80 + "\n")
-
-            # --- SILENT MODE (invoke) ---
-            else:
-                result = self.agent_executor.invoke({"messages": messages})
-                final_response = result["messages"][-1].content
-
-            # Update history
-            self.chat_history.append({"role": "user", "content": message})
-            self.chat_history.append({"role": "assistant", "content": final_response})
-
-            return final_response
-
+            async for mode, data in self.agent_executor.astream(
+                    {"messages": messages}, stream_mode=["messages", "values"]):
+                if mode == "messages":
+                    # LLM tokens; the RAG tool's own LLM streams too, so keep only the agent node
+                    chunk, metadata = data
+                    if metadata.get("langgraph_node") != "agent":
+                        continue
+                    if chunk.id != current_message_id:
+                        # every agent step is a new message with its own <think> block
+                        tail = "" if tool_step else stripper.flush()
+                        if tail:
+                            yield tail
+                        current_message_id = chunk.id
+                        stripper = ThinkStripper()
+                        tool_step = streamed = False
+                    if tool_step:
+                        continue
+                    if getattr(chunk, "tool_call_chunks", None):
+                        # Only the final answer is the reply; drop this step's preamble
+                        tool_step = True
+                        if streamed:
+                            yield REPLY_RESET
+                        continue
+                    visible = stripper.feed(message_text(chunk.content))
+                    if visible:
+                        streamed = True
+                        yield visible
+                else:
+                    # Parallel tool calls land in one step, so look at every new message, not just the last
+                    new_messages = data["messages"][seen:]
+                    seen = len(data["messages"])
+                    for current_message in new_messages:
+                        if current_message.type == 'ai' and current_message.tool_calls \
+                                and current_message.id == current_message_id and not tool_step:
+                            # tool calls that were not streamed as chunks
+                            tool_step = True
+                            if streamed:
+                                yield REPLY_RESET
+                        if self.show_thinking:
+                            self._print_thinking_step(current_message)
+                        if current_message.type == 'tool':
+                            observations.append(
+                                history.compact_observation(current_message.name, current_message.content)
+                            )
+                        elif current_message.type == 'ai':
+                            model_messages.append(current_message)
+                        if current_message.type == 'ai' and not current_message.tool_calls:
+                            final_response = current_message.content
+                            usage = getattr(current_message, "usage_metadata", None)
+                            input_tokens = usage.get("input_tokens") if usage else None
+            tail = "" if tool_step else stripper.flush()
+            if tail:
+                yield tail
         except Exception as e:
-            return f"Error processing message: {str(e)}"
+            yield f"Error processing message: {str(e)}"
+            return
+
+        if self.show_thinking:
+            timing = self.tool_guard.timing_summary()
+            if timing["calls"] > 1:
+                print(f"\n Tool timing: {timing['calls']} calls, "
+                      f"sequential {timing['sequential']:.2f}s, "
+                      f"wall-clock {timing['wall_clock']:.2f}s, "
+                      f"saved {timing['saved']:.2f}s")
+            if self.tool_cache is not None:
+                cache_turn = self.tool_cache.turn_summary()
+                print(f" Tool cache: {cache_turn['hits']} hits, {cache_turn['misses']} misses this turn "
+                      f"({self.tool_cache.hits} hits, {self.tool_cache.misses} misses in total)")
+            print(f" Prompt tokens: conversation ~{conversation_tokens} "
+                  f"({verbatim_turns} turns verbatim, summary ~{estimate_tokens(history.summary)})"
+                  + (f", final model call {input_tokens} input tokens" if input_tokens is not None else ""))
+        if self.prompt_caching:
+            usage = prompt_cache_usage(model_messages)
+            print(f"\n Prompt cache: {usage['calls']} model calls, {usage['input']} input tokens, "
+                  f"{usage['cache_read']} read from cache, {usage['cache_write']} written to cache")
+        if self.show_thinking:
+            print("─" * 80 + "\n")
+
+        # Update history (older turns are summarized in the background)
+        history.add_turn(message, final_response, observations)
+
+    @staticmethod
+    def _print_thinking_step(current_message):
+        if hasattr(current_message, 'tool_calls') and current_message.tool_calls:
+            for tool in current_message.tool_calls:
+                print(f"\n Thought: I need to use tool '{tool['name']}'")
+                print(f"   Args: {tool['args']}")
+
+        elif current_message.type == 'tool':
+            preview = current_message.content[:200] + "..." if len(current_message.content) > 200 else current_message.content
+            print(f"\n Observation ({current_message.name}):")
+            print(f"   {preview}")
+
+    def close(self):
+        """Releases the pooled HTTP connections to the MCP server and stops the event loop."""
+        self._run_async(self.http.aclose())
+        self.http.close()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
 
 
 # =================================================================
@@ -352,8 +1895,9 @@ def parse_args():
     )
     parser.add_argument(
         "mode",
-        choices=["graph", "text"],
-        help="Interface mode:\n  graph — Gradio web UI\n  text  — terminal chat"
+        choices=["graph", "text", "benchmark"],
+        help="Interface mode:\n  graph     — Gradio web UI\n  text      — terminal chat\n"
+             "  benchmark — time PDF text extraction with 1 vs --workers processes"
     )
     parser.add_argument(
         "--provider",
@@ -385,21 +1929,141 @@ def parse_args():
         default=False,
         help="Show the agent's thinking / tool-use process (streaming mode)."
     )
+    parser.add_argument(
+        "--docs",
+        default=PDF_DOCUMENT_PATH,
+        help="PDF file or directory of PDFs to index for document Q&A\n"
+             f"(default: {PDF_DOCUMENT_PATH}). Only new or changed files are re-embedded."
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        default=False,
+        help="Send the tool calls of one agent step to the MCP server in a single /batch request\n"
+             "(useful when the server runs on another host)."
+    )
+    parser.add_argument(
+        "--import-report",
+        action="store_true",
+        default=False,
+        help="Print the import time of this module plus what the chosen mode loads, then exit."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=EXTRACT_WORKERS,
+        help="Worker processes for PDF text extraction while indexing (default: 1)."
+    )
+    parser.add_argument(
+        "--no-tool-cache",
+        action="store_true",
+        default=False,
+        help="Always call the MCP server instead of reusing cached tool results\n"
+             "(get_calc, get_weather for 10 minutes, get_SQL_response until the next put_SQL_insert)."
+    )
+    parser.add_argument(
+        "--prompt-cache",
+        action="store_true",
+        default=False,
+        help="With --provider anthropic: cache the tool descriptions and older history turns\n"
+             "between agent steps and print cache read/write tokens per turn."
+    )
 
     return parser.parse_args()
 
-def clean_agent_response(agent_output_string):
-    if "</think>" in agent_output_string:
-        clean_output = agent_output_string.split("</think>", 1)[1]
-    else:
-        clean_output = agent_output_string
-    return clean_output.strip()
+def benchmark_pdf_extraction(workers: int, pages: int = BENCHMARK_PAGES):
+    """Replicates BENCHMARK_PDF_PATH to `pages` pages and times page extraction + chunking."""
+    from pypdf import PdfReader, PdfWriter
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    reader = PdfReader(BENCHMARK_PDF_PATH)
+    writer = PdfWriter()
+    while len(writer.pages) < pages:
+        for page in reader.pages[:pages - len(writer.pages)]:
+            writer.add_page(page)
+
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+
+    def run(n_workers: int, path: str):
+        start = time.perf_counter()
+        chunks = 0
+        with (ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 else nullcontext()) as executor:
+            for page in iter_pdf_pages(path, executor, n_workers):
+                chunks += len(text_splitter.split_documents([page]))
+        return time.perf_counter() - start, chunks
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "benchmark.pdf")
+        with open(path, "wb") as f:
+            writer.write(f)
+        print(f"Benchmark PDF: {pages} pages replicated from '{BENCHMARK_PDF_PATH}'")
+        single_time, single_chunks = run(1, path)
+        print(f"  1 worker    : {single_time:7.2f}s  ({pages / single_time:7.1f} pages/s, {single_chunks} chunks)")
+        if workers > 1:
+            multi_time, multi_chunks = run(workers, path)
+            print(f"  {workers} workers  : {multi_time:7.2f}s  "
+                  f"({pages / multi_time:7.1f} pages/s, {multi_chunks} chunks)  speedup x{single_time / multi_time:.2f}")
+
+
+def import_mode_dependencies(mode: str):
+    """Imports the modules `mode` would load lazily, so their cost can be measured."""
+    for module in MODE_IMPORTS[mode]:
+        importlib.import_module(module)
+
+
+def report_import_times(mode: str, top: int = 15):
+    """Runs `python -X importtime` on this module + the mode's imports and summarizes it per package."""
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    module_name = os.path.splitext(os.path.basename(__file__))[0]
+    code = f"import {module_name}; {module_name}.import_mode_dependencies({mode!r})"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, cwd=module_dir
+    )
+    if result.returncode != 0:
+        print(f"Import failed:\n{result.stderr[-2000:]}")
+        return
+
+    # Lines come children first; a top-level import has one leading space, its direct
+    # children three. This module's own entry is split into its direct imports, so a heavy
+    # module-level import shows up under its package rather than as "little_mcp got slower".
+    packages = {}
+    children = []  # (package, cumulative) of direct imports since the last top-level line
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        indent = len(name) - len(name.lstrip())
+        package = name.strip().split(".")[0]
+        if indent == 3:
+            children.append((package, int(cumulative)))
+        elif indent == 1:
+            if name.strip() == module_name:
+                for child, micros in children:
+                    packages[child] = packages.get(child, 0) + micros
+                packages[module_name] = packages.get(module_name, 0) + int(self_us)
+            else:
+                packages[package] = packages.get(package, 0) + int(cumulative)
+            children = []
+
+    total_ms = sum(packages.values()) / 1000
+    print(f"Import time for '{mode}' mode: {total_ms:.0f} ms across {len(packages)} top-level packages")
+    for package, micros in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {micros / 1000:8.1f} ms  {package}")
+
 
 def main():
     args = parse_args()
 
-    if not os.path.exists(PDF_DOCUMENT_PATH):
-        print(f"Error: PDF file not found at '{PDF_DOCUMENT_PATH}'.")
+    if args.import_report:
+        report_import_times(args.mode)
+        return
+
+    if args.mode == "benchmark":
+        benchmark_pdf_extraction(max(args.workers, 1))
+        return
+
+    if not os.path.exists(args.docs):
+        print(f"Error: PDF file not found at '{args.docs}'.")
         return
 
     # API key can also come from environment variable
@@ -412,11 +2076,15 @@ def main():
         display_model = args.model or DEFAULT_OLLAMA_MODEL
 
     client = FastMCPLangChainClient(
-        pdf_path=PDF_DOCUMENT_PATH,
+        pdf_path=args.docs,
         provider=args.provider,
         api_key=api_key,
         model=args.model,
         show_thinking=args.think,
+        batch_tool_calls=args.batch,
+        extract_workers=args.workers,
+        cache_tool_results=not args.no_tool_cache,
+        prompt_caching=args.prompt_cache,
     )
 
     try:
@@ -424,8 +2092,10 @@ def main():
 
         print(f"\n{'=' * 55}")
         print(f"  Little MCP Agent  —  v{VERSION}")
-        print(f"  Provider : {args.provider.upper()}")
+        print(f"  Provider : {args.provider.upper()}" + (" (prompt caching)" if client.prompt_caching else ""))
         print(f"  Model    : {display_model}")
+        print(f"  Server   : {SERVER_URL} ({client.server_status})")
+        print(f"  Startup  : {client.startup_report()}")
         print(f"  Mode     : {'易 THINKING' if args.think else '狼 SILENT'}")
         print(f"{'=' * 55}")
         print("Example questions:")
@@ -436,14 +2106,20 @@ def main():
         print(" Your Assistant is Ready!\n")
 
         if args.mode == "graph":
+            import gradio as gr
+
             # callback 
-            def chat_with_agent(message, history):
+            def chat_with_agent(message, history, request: gr.Request):
+                # A generator: Gradio re-renders the reply as each token arrives.
+                # Each browser session gets its own conversation on the shared agent.
                 try:
-                    response = client.chat(message)
-                    return clean_agent_response(response)
+                    partial = ""
+                    for delta in client.stream_chat(message, session_id=request.session_hash or DEFAULT_SESSION):
+                        partial = "" if delta is REPLY_RESET else partial + delta
+                        yield partial
                 except Exception as e:
                     print(f"An error occurred: {e}")
-                    return "Sorry, I encountered an error while processing your request."
+                    yield "Sorry, I encountered an error while processing your request."
 
             demo = gr.ChatInterface(
                 fn=chat_with_agent,
@@ -459,6 +2135,7 @@ def main():
                 ],
                 textbox=gr.Textbox(placeholder="Ask your agent a question...", scale=7),
             )
+            demo.queue(default_concurrency_limit=GRADIO_CONCURRENCY, max_size=GRADIO_QUEUE_SIZE)
             demo.launch(share=False, debug=True)
 
         elif args.mode == "text":
@@ -473,14 +2150,21 @@ def main():
                     if not user_input:
                         continue
                     print("\nAssistant: ", end="", flush=True)
-                    response = client.chat(user_input)
-                    print(clean_agent_response(response))
+                    for delta in client.stream_chat(user_input):
+                        if delta is REPLY_RESET:
+                            # printed text can't be taken back: keep the step's preamble on its own line
+                            print("\n\nAssistant: ", end="", flush=True)
+                        else:
+                            print(delta, end="", flush=True)
+                    print()
                     print("-" * 50)
                 except (KeyboardInterrupt, EOFError):
                     print("\n\nExiting chat. Goodbye!")
                     break
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+    finally:
+        client.close()
 
 
 if __name__ == "__main__":
@@ -7,12 +7,24 @@ personal documents and provide real-time information.
 VERSION="0.5.2" # SQL db support    
 
 import os
-import requests
+import re
+import sys
+import time
+import asyncio
+import sqlite3
+import threading
+import httpx
+from collections import OrderedDict
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from functools import lru_cache
+from typing import List
 from fastapi import FastAPI, HTTPException, Query
+from pydantic import BaseModel
 from datetime import datetime
 import pytz
 from timezonefinder import TimezoneFinder
 from geopy.geocoders import Nominatim
+from geopy.adapters import AioHTTPAdapter
 from dotenv import load_dotenv
 import uvicorn
 #----------------------------------------------#
@@ -23,32 +35,233 @@ import uvicorn
 # Load environment variables from .env file for the API key
 load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Creates the shared resources at startup and releases them at shutdown."""
+    global db_pool, http_client, geolocator, geocode_cache, timezone_finder
+    db_pool = create_db_pool()
+    timezone_finder = load_timezone_finder()
+    geocode_cache = GeocodeCache(
+        os.getenv('GEOCODE_CACHE_PATH', 'geocode_cache.sqlite'),
+        max_entries=int(os.getenv('GEOCODE_CACHE_SIZE', '1024')),
+        ttl=float(os.getenv('GEOCODE_CACHE_TTL', str(30 * 24 * 3600))),
+    )
+    async with AsyncExitStack() as stack:
+        # One non-blocking HTTP client and geocoder for the whole server, so slow
+        # upstream calls wait on the event loop instead of holding a worker thread.
+        max_connections = int(os.getenv('MCP_HTTP_MAX_CONNECTIONS', '200'))
+        http_client = await stack.enter_async_context(httpx.AsyncClient(
+            timeout=float(os.getenv('MCP_HTTP_TIMEOUT', '10')),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        ))
+        geolocator = await stack.enter_async_context(
+            Nominatim(user_agent="mcp_datetime_app", adapter_factory=AioHTTPAdapter)
+        )
+        yield
+    geocode_cache.close()
+    if db_pool is not None:
+        db_pool.close()
+
+
 # Initialize the FastAPI application
 app = FastAPI(
     title="MCP Tool Server",
     description="Provides tools like weather and datetime as a service.",
-    version="0.1"
+    version="0.1",
+    lifespan=lifespan
 )
 
 
+# --- Response Caches ---
+
+def normalize_city(city: str) -> str:
+    """'  Sydney,  Australia ' and 'sydney, australia' share one cache entry."""
+    return " ".join(city.lower().split())
+
+
+
+class GeocodeCache:
+    """
+    Two-tier cache of city coordinates: an in-memory LRU in front of a SQLite table
+    that survives restarts. Entries older than `ttl` seconds are treated as missing.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1024, ttl: float = 30 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()      # the in-memory LRU only, never held across SQLite I/O
+        self._db_lock = threading.Lock()   # the SQLite connection, used from worker threads
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            "city TEXT PRIMARY KEY, latitude REAL, longitude REAL, address TEXT, created REAL)"
+        )
+        self._db.commit()
+
+    async def get(self, city: str):
+        # Memory hits are answered on the event loop; only the SQLite tier goes to a thread
+        key = normalize_city(city)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if time.time() - entry['created'] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    return entry
+                del self._memory[key]
+        return await asyncio.to_thread(self._load, key)
+
+    def _load(self, key: str):
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT latitude, longitude, address, created FROM geocode WHERE city = ?", (key,)
+            ).fetchone()
+        if row is None or time.time() - row[3] > self.ttl:
+            return None
+        entry = {'latitude': row[0], 'longitude': row[1], 'address': row[2], 'created': row[3]}
+        self._remember(key, entry)
+        return entry
+
+    async def put(self, city: str, latitude: float, longitude: float, address: str) -> dict:
+        return await asyncio.to_thread(self._store, normalize_city(city), latitude, longitude, address)
+
+    def _store(self, key: str, latitude: float, longitude: float, address: str) -> dict:
+        entry = {'latitude': latitude, 'longitude': longitude, 'address': address, 'created': time.time()}
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO geocode (city, latitude, longitude, address, created) VALUES (?, ?, ?, ?, ?)",
+                (key, latitude, longitude, address, entry['created'])
+            )
+            self._db.commit()
+        self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: dict):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def close(self):
+        with self._db_lock:
+            self._db.close()
+
+
+class StaleWhileRevalidateCache:
+    """
+    Async response cache with request coalescing.
+
+    A value younger than `ttl` is served as is. Between `ttl` and `ttl + stale_ttl` the
+    stale value is served immediately while one background refresh runs. Concurrent
+    misses for the same key await a single upstream call. Error responses (dicts with
+    an 'error' key) are never stored.
+    """
+
+    def __init__(self, fetch, ttl: float, stale_ttl: float, max_entries: int = 1024):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, fetched_at)
+        self._inflight = {}  # key -> asyncio.Task shared by every waiter
+
+    async def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age <= self.ttl:
+                self._entries.move_to_end(key)
+                return value
+            if age <= self.ttl + self.stale_ttl:
+                self._refresh(key)
+                return value
+        # Shielded, so a cancelled waiter does not cancel the fetch for the others
+        return await asyncio.shield(self._refresh(key))
+
+    def _refresh(self, key: str) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_and_store(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._refresh_done(key, done))
+        return task
+
+    def _refresh_done(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # Background refreshes have no waiter, so their errors are reported here
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Refreshing cached response for '{key}' failed: {task.exception()!r}")
+
+    async def _fetch_and_store(self, key: str):
+        value = await self.fetch(key)
+        if not (isinstance(value, dict) and 'error' in value):
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+# Async clients and caches shared by the tool functions, created in lifespan().
+http_client = None
+geolocator = None
+geocode_cache = None
+timezone_finder = None
+
+
+# --- Timezone Lookup ---
+
+# Coordinates are rounded to this many decimals (3 ~ 100 m) before the memo lookup
+TIMEZONE_CACHE_PRECISION = int(os.getenv('TIMEZONE_CACHE_PRECISION', '3'))
+
+# The finder reads polygon data from shared file handles, so lookups are serialized
+_timezone_lock = threading.Lock()
+
+
+def load_timezone_finder():
+    """
+    Loads the finder once. By default polygon data is read from the package's data
+    files on each lookup (memory-mapped only on newer timezonefinder releases);
+    set TIMEZONE_FINDER_IN_MEMORY=1 to read it fully into RAM for faster lookups.
+    """
+    in_memory = os.getenv('TIMEZONE_FINDER_IN_MEMORY', '0') == '1'
+    return TimezoneFinder(in_memory=in_memory)
+
+
+@lru_cache(maxsize=4096)
+def _timezone_at_rounded(lat: float, lng: float):
+    with _timezone_lock:
+        return timezone_finder.timezone_at(lat=lat, lng=lng)
+
+
 # --- Tool Functions (Your Business Logic) ---
 
-def get_date_time(city: str):
+def find_timezone(lat: float, lng: float):
+    """Point-in-polygon search, memoized at TIMEZONE_CACHE_PRECISION decimals."""
+    return _timezone_at_rounded(round(lat, TIMEZONE_CACHE_PRECISION), round(lng, TIMEZONE_CACHE_PRECISION))
+
+
+async def get_date_time(city: str):
     """Gets the current date and time for a given city."""
     try:
-        geolocator = Nominatim(user_agent="mcp_datetime_app")
-        location = geolocator.geocode(city, timeout=10)
+        # City coordinates never change, so Nominatim is only asked once per city
+        location = await geocode_cache.get(city)
         if location is None:
-            raise ValueError(f'City "{city}" not found.')
+            found = await geolocator.geocode(city, timeout=10)
+            if found is None:
+                raise ValueError(f'City "{city}" not found.')
+            location = await geocode_cache.put(city, found.latitude, found.longitude, found.address)
 
-        tf = TimezoneFinder()
-        timezone_str = tf.timezone_at(lat=location.latitude, lng=location.longitude)
+        timezone_str = await asyncio.to_thread(find_timezone, location['latitude'], location['longitude'])
         if timezone_str is None:
             raise ValueError(f'Could not determine timezone for {city}.')
 
         tz = pytz.timezone(timezone_str)
         current_time = datetime.now(tz)
-        city_name = location.address.split(',')[0]
+        city_name = location['address'].split(',')[0]
 
         return {
             'city': city_name,
@@ -61,8 +274,8 @@ def get_date_time(city: str):
         return {'error': str(e)}
 
 
-def get_weather(city: str):
-    """Gets the current weather for a given city."""
+async def fetch_weather(city: str):
+    """Calls OpenWeatherMap for the current weather in a given city."""
     base_url = "http://api.openweathermap.org/data/2.5/weather"
     api_key = os.getenv('OPENWEATHER_API_KEY')
     if not api_key:
@@ -71,14 +284,27 @@ def get_weather(city: str):
     params = {"q": city, "appid": api_key, "units": "metric"}
 
     try:
-        response = requests.get(base_url, params=params)
+        response = await http_client.get(base_url, params=params)
         response.raise_for_status()
         return response.json()
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         # Return a dictionary for errors
         return {'error': f'Failed to fetch weather: {e}'}
 
 
+# Fresh for WEATHER_CACHE_TTL seconds, then served stale for up to WEATHER_CACHE_STALE more
+weather_cache = StaleWhileRevalidateCache(
+    fetch_weather,
+    ttl=float(os.getenv('WEATHER_CACHE_TTL', '600')),
+    stale_ttl=float(os.getenv('WEATHER_CACHE_STALE', '1800')),
+)
+
+
+async def get_weather(city: str):
+    """Gets the current weather for a given city."""
+    return await weather_cache.get(normalize_city(city))
+
+
 def get_Calc(l_operation: str):
 
     OPERATION, NUM_ONE, NUM_TWO = l_operation.split(", ")
@@ -106,32 +332,170 @@ def get_Calc(l_operation: str):
     return str(result)
 
 # - * - * - * - * - * - * - * - * - * - * - * - * - * - * - * - * - * - * - *
-def query_mariadb(query: str, db_config: dict) -> str:
+# --- MariaDB Connection Pool ---
+
+def get_db_config() -> dict:
+    """Returns the MariaDB connection details shared by Get_SQL and Update_SQL."""
+    # Please Configure your database connection details.
+    return {
+        'user': os.getenv('DB_USER'),
+        'password': os.getenv('DB_PASSWORD'),
+        'host': '127.0.0.1',  # Or your MariaDB server IP/hostname
+        'port': 3306,  # Default MariaDB port
+        'database': 'MYSTORE'  # The database you want to query
+    }
+
+
+class MariaDBPool:
+    """
+    A small thread-safe pool of MariaDB connections.
+
+    Connections are borrowed with `connection()` and handed back when the block ends.
+    Idle connections older than `idle_timeout` are closed and replaced, and a connection
+    that has been idle longer than `ping_interval` is pinged before being reused.
+    """
+
+    def __init__(self, db_config: dict, size: int = 5, idle_timeout: float = 300.0,
+                 ping_interval: float = 30.0, acquire_timeout: float = 10.0):
+        self.db_config = db_config
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self.acquire_timeout = acquire_timeout
+        self._idle = []  # stack of (connection, last_used) so the warmest one is reused first
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._in_use = 0
+        self._stats = {'created': 0, 'reused': 0, 'recycled': 0, 'failed_health_checks': 0, 'timeouts': 0}
+
+    def _take_idle(self):
+        """Pops a healthy idle connection, discarding stale or broken ones on the way."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                conn, last_used = self._idle.pop()
+            idle_for = time.monotonic() - last_used
+            if idle_for > self.idle_timeout:
+                self._discard(conn)
+                with self._lock:
+                    self._stats['recycled'] += 1
+                continue
+            if idle_for > self.ping_interval:
+                try:
+                    conn.ping()
+                except mariadb.Error:
+                    self._discard(conn)
+                    with self._lock:
+                        self._stats['failed_health_checks'] += 1
+                    continue
+            with self._lock:
+                self._stats['reused'] += 1
+            return conn
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except mariadb.Error:
+            pass
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise mariadb.PoolError(f"No free connection in the pool after {self.acquire_timeout}s.")
+        try:
+            conn = self._take_idle()
+            if conn is None:
+                conn = mariadb.connect(**self.db_config)
+                with self._lock:
+                    self._stats['created'] += 1
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_use += 1
+        return conn
+
+    def release(self, conn):
+        try:
+            # End the implicit transaction so the next borrower reads fresh data;
+            # a connection that can't even roll back is not worth keeping.
+            conn.rollback()
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        except mariadb.Error:
+            self._discard(conn)
+            with self._lock:
+                self._stats['failed_health_checks'] += 1
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'size': self.size, 'in_use': self._in_use, 'idle': len(self._idle), **self._stats}
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+
+# Created at startup (see lifespan below) when the mariadb module is available.
+db_pool = None
+
+
+def create_db_pool():
+    """Builds the server-wide pool, sized from the MARIADB_POOL_* environment variables."""
+    if 'mariadb' not in globals():
+        print("MariaDB module not imported: SQL tools are disabled.")
+        return None
+    pool = MariaDBPool(
+        get_db_config(),
+        size=int(os.getenv('MARIADB_POOL_SIZE', '5')),
+        idle_timeout=float(os.getenv('MARIADB_POOL_IDLE_TIMEOUT', '300')),
+        ping_interval=float(os.getenv('MARIADB_POOL_PING_INTERVAL', '30')),
+        acquire_timeout=float(os.getenv('MARIADB_POOL_ACQUIRE_TIMEOUT', '10')),
+    )
+    print(f"MariaDB connection pool ready (size={pool.size}).")
+    return pool
+
+
+# - * - * - * - * - * - * - * - * - * - * - * - * - * - * - * - * - * - * - *
+def query_mariadb(query: str, pool: MariaDBPool) -> str:
     """
-    Connects to a MariaDB database, executes a read-only query,
+    Borrows a pooled MariaDB connection, executes a read-only query,
     and returns the formatted result as a string.
     Args:
         query: The SQL SELECT query to execute.
-        db_config: A dictionary with connection details:
-                   {'user': 'your_user', 'password': 'your_password',
-                    'host': 'your_host', 'port': 3306, 'database': 'your_db'}
+        pool: The server-wide MariaDBPool built from get_db_config().
     Returns:
         A string containing the formatted query results, or an error message.
     """
-    conn = None  # Initialize conn to None
+    if pool is None:
+        return "Error: MariaDB connection pool is not available."
     try:
-        # Establish the database connection
-        conn = mariadb.connect(**db_config)
-        ###print("Connection successful.")
+        with pool.connection() as conn:
+            # Create a cursor object to interact with the database
+            cur = conn.cursor()
 
-        # Create a cursor object to interact with the database
-        cur = conn.cursor()
+            # Execute the provided query
+            cur.execute(query)
 
-        # Execute the provided query
-        cur.execute(query)
-
-        # Fetch all the rows from the query result
-        rows = cur.fetchall()
+            # Fetch all the rows from the query result
+            rows = cur.fetchall()
+            cur.close()
 
         # Check if the query returned any results
         if not rows:
@@ -145,93 +509,226 @@ def query_mariadb(query: str, db_config: dict) -> str:
         return formatted_results
 
     except mariadb.Error as e:
-        # Handle potential database errors (e.g., connection failed, bad query)
+        # Handle potential database errors (e.g., pool exhausted, bad query)
         print(f"Error connecting to or querying MariaDB: {e}")
         return f"Error: {e}"
 
-    finally:
-        # Ensure the connection is always closed, even if errors occur
-        if conn:
-            conn.close()
-            print("Connection closed.")
+# --- SQL Read Cache ---
+
+_SQL_LITERAL = re.compile(r"('(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\")")
+_SQL_IDENT = r"[`\w.$]+"
+# Words that can follow a table name; never taken as an alias, and a "table" with one of
+# these names means the statement was not understood
+_SQL_KEYWORDS = (
+    "JOIN", "STRAIGHT_JOIN", "INNER", "CROSS", "LEFT", "RIGHT", "NATURAL", "OUTER", "FULL",
+    "WHERE", "SET", "VALUES", "VALUE", "ON", "USING", "TABLE", "SELECT", "INTO", "FROM",
+    "GROUP", "ORDER", "HAVING", "LIMIT", "UNION", "INTERSECT", "EXCEPT", "FOR", "LOCK",
+    "WINDOW", "PARTITION", "USE", "IGNORE", "FORCE", "RETURNING", "PROCEDURE", "AS",
+)
+_SQL_KEYWORD_SET = {keyword.lower() for keyword in _SQL_KEYWORDS}
+_SQL_ALIAS = rf"(?:\s+(?:AS\s+)?(?!(?:{'|'.join(_SQL_KEYWORDS)})\b)\w+)?"
+_SQL_TABLE_LIST = rf"({_SQL_IDENT}{_SQL_ALIAS}(?:\s*,\s*{_SQL_IDENT}{_SQL_ALIAS})*)"
+_SQL_READ_TABLES = re.compile(rf"\b(?:FROM|JOIN|STRAIGHT_JOIN)\s+{_SQL_TABLE_LIST}", re.IGNORECASE)
+# FROM is included so DELETE FROM and multi-table DELETE are covered; a source table
+# of INSERT ... SELECT is then invalidated too, which only costs a cache miss
+_SQL_WRITE_TABLES = re.compile(
+    rf"\b(?:UPDATE|INTO(?:\s+TABLE)?|TABLE|FROM|JOIN|STRAIGHT_JOIN)\s+(?:(?:LOW_PRIORITY|IGNORE|QUICK)\s+)*"
+    rf"(?:IF\s+(?:NOT\s+)?EXISTS\s+)?{_SQL_TABLE_LIST}",
+    re.IGNORECASE
+)
+# Functions whose result changes without any table being written
+_SQL_VOLATILE = re.compile(
+    r"\b(?:NOW|SYSDATE|CURDATE|CURTIME|CURRENT_DATE|CURRENT_TIME|CURRENT_TIMESTAMP|UNIX_TIMESTAMP|"
+    r"RAND|UUID|UUID_SHORT|LAST_INSERT_ID|FOUND_ROWS|ROW_COUNT|CONNECTION_ID|USER|SLEEP)\b",
+    re.IGNORECASE
+)
 
-def Get_SQL(l_operation: str) -> str:
-    # Please Configure your database connection details.
 
-    db_user = os.getenv('DB_USER')
-    db_password = os.getenv('DB_PASSWORD')
-    db_connection_config = {
-        'user': db_user,
-        'password': db_password,
-        'host': '127.0.0.1',  # Or your MariaDB server IP/hostname
-        'port': 3306,  # Default MariaDB port
-        'database': 'MYSTORE'  # The database you want to query
-    }
+def normalize_sql(sql: str) -> str:
+    """Collapses whitespace outside string literals and drops trailing semicolons."""
+    parts = _SQL_LITERAL.split(sql.strip().rstrip(";").strip())
+    return "".join(part if i % 2 else " ".join(part.split()) for i, part in enumerate(parts))
+
+
+def _table_name(identifier: str) -> str:
+    """`shop`.`FRUITS` -> fruits. Compared case-insensitively, so a write never misses a read."""
+    return identifier.replace("`", "").split(".")[-1].lower()
+
+
+def _sql_tables(pattern, sql: str):
+    """Table names matched by `pattern`, or None when the parse looks incomplete."""
+    code = " ".join(_SQL_LITERAL.split(sql)[::2])   # ignore table-like words inside literals
+    tables = {_table_name(item.split()[0]) for table_list in pattern.findall(code) for item in table_list.split(",")}
+    if tables & _SQL_KEYWORD_SET:
+        return None   # a keyword was taken for a table name
+    return tables
+
+
+def sql_read_tables(sql: str) -> set:
+    """Tables a SELECT reads, or an empty set when it cannot be cached safely."""
+    code = " ".join(_SQL_LITERAL.split(sql)[::2])
+    if not re.match(r"\s*SELECT\b", code, re.IGNORECASE) or _SQL_VOLATILE.search(code):
+        return set()
+    return _sql_tables(_SQL_READ_TABLES, sql) or set()
+
 
+def sql_write_tables(statement: str) -> set:
+    """Tables a data modification statement may change; empty when they cannot be told."""
+    return _sql_tables(_SQL_WRITE_TABLES, statement) or set()
+
+
+class SQLReadCache:
+    """
+    Thread-safe cache of SELECT results keyed by normalized SQL text. Each entry
+    remembers the tables its query reads, and a write to any of them evicts it.
+    Entries are evicted least recently used first to keep the results under `max_bytes`.
+    A query that was running while one of its tables was written is not stored.
+    """
+
+    def __init__(self, max_bytes: int = 4 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # normalized sql -> (result, tables, size)
+        self._by_table = {}             # table -> set of normalized sql reading it
+        self._generations = {}          # table -> number of writes seen
+        self._global_generation = 0     # writes whose tables could not be told
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get(self, sql: str):
+        """Returns (cached result or None, token to pass to put)."""
+        key = normalize_sql(sql)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[0], None
+            self._stats['misses'] += 1
+        tables = sql_read_tables(key)
+        if not tables:
+            return None, None
+        with self._lock:
+            # taken before the query runs, so put() can tell whether a write overlapped it
+            generations = {table: self._generations.get(table, 0) for table in tables}
+            return None, (key, tables, generations, self._global_generation)
+
+    def put(self, token, result: str):
+        if token is None or result.startswith("Error"):
+            return
+        key, tables, generations, global_generation = token
+        size = len(key) + len(result.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if global_generation != self._global_generation or any(
+                    self._generations.get(table, 0) != generation for table, generation in generations.items()):
+                return  # a table changed while the query was running
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (result, tables, size)
+            self._bytes += size
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def invalidate(self, statement: str):
+        """Evicts the results that read any table `statement` writes (all of them if unknown)."""
+        tables = sql_write_tables(statement)
+        with self._lock:
+            if not tables:
+                # also covers reads in flight of tables not seen before
+                self._global_generation += 1
+                tables = set(self._by_table)
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+                for key in list(self._by_table.get(table, ())):
+                    self._remove(key)
+                    self._stats['invalidations'] += 1
+
+    def _remove(self, key: str):
+        result, tables, size = self._entries.pop(key)
+        self._bytes -= size
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes, **self._stats}
+
+
+# Bounded by SQL_CACHE_MAX_BYTES of cached results; 0 turns the cache off
+SQL_CACHE_MAX_BYTES = int(os.getenv('SQL_CACHE_MAX_BYTES', str(4 * 1024 * 1024)))
+sql_cache = SQLReadCache(max_bytes=SQL_CACHE_MAX_BYTES) if SQL_CACHE_MAX_BYTES > 0 else None
+
+
+def Get_SQL(l_operation: str) -> str:
     sql_query = l_operation
+    token = None
+    if sql_cache is not None:
+        cached, token = sql_cache.get(sql_query)
+        if cached is not None:
+            return cached
     print("\n--- Running Query ---")
-    response = query_mariadb(sql_query, db_connection_config)
+    response = query_mariadb(sql_query, db_pool)
+    if sql_cache is not None:
+        sql_cache.put(token, response)
 
     return response
 
 # - * - * - * - * - * - * - * - * - * - * - * - * - * - * - * - * - * - * - *
-def execute_mariadb(statement: str, db_config: dict) -> str:
+def execute_mariadb(statement: str, pool: MariaDBPool) -> str:
     """
-    Connects to MariaDB, executes a data modification statement (INSERT, UPDATE, DELETE),
-    and commits the changes.
+    Borrows a pooled MariaDB connection, executes a data modification statement
+    (INSERT, UPDATE, DELETE), and commits the changes.
 
     Args:
         statement: The SQL statement to execute (e.g., UPDATE, INSERT).
-        db_config: A dictionary with connection details.
+        pool: The server-wide MariaDBPool built from get_db_config().
 
     Returns:
         A string confirming the number of rows affected, or an error message.
     """
-    conn = None
+    if pool is None:
+        return "Error: MariaDB connection pool is not available."
     try:
-        # Establish the database connection
-        conn = mariadb.connect(**db_config)
-        cur = conn.cursor()
+        with pool.connection() as conn:
+            cur = conn.cursor()
 
-        # Execute the provided statement
-        cur.execute(statement)
+            # Execute the provided statement
+            cur.execute(statement)
 
-        # For statements that change data, you MUST commit the transaction
-        conn.commit()
+            # For statements that change data, you MUST commit the transaction
+            # (on error the pool rolls the connection back before reusing it)
+            conn.commit()
 
-        # cur.rowcount gives you the number of rows affected by the statement
-        affected_rows = cur.rowcount
+            # cur.rowcount gives you the number of rows affected by the statement
+            affected_rows = cur.rowcount
+            cur.close()
 
         # Grab the first word of the statement (e.g., "INSERT", "UPDATE") for better context
         operation_type = statement.strip().split()[0].upper()
         return f"{operation_type} executed."
 
     except mariadb.Error as e:
-        # If an error occurs, it's good practice to roll back any changes
-        if conn:
-            conn.rollback()
         print(f"Error executing statement in MariaDB: {e}")
         return f"Error: {e}"
 
-    finally:
-        # Ensure the connection is always closed
-        if conn:
-            conn.close()
-            print("Connection closed.")
-
 def Update_SQL(statement: str) -> str:
     """A wrapper function to easily execute UPDATE, INSERT, or DELETE statements."""
-    db_user = os.getenv('DB_USER')
-    db_password = os.getenv('DB_PASSWORD')
-    db_connection_config = {
-        'user': db_user,
-        'password': db_password,
-        'host': '127.0.0.1',
-        'port': 3306,
-        'database': 'MYSTORE'
-    }
     ###print("\n--- Executing Statement ---")
-    response = execute_mariadb(statement, db_connection_config)
+    try:
+        response = execute_mariadb(statement, db_pool)
+    finally:
+        # Also after a failure: the statement may have changed rows before it failed
+        if sql_cache is not None:
+            sql_cache.invalidate(statement)
 
     return response
 
@@ -239,25 +736,41 @@ def Update_SQL(statement: str) -> str:
 # --- API Endpoints ---
 
 @app.get("/")
-def read_root():
+async def read_root():
     """A simple endpoint to check if the server is running."""
     return {"status": "MCP Server is running"}
 
 
+@app.get("/pool_stats")
+async def read_pool_stats():
+    """Returns usage counters for the MariaDB connection pool."""
+    if db_pool is None:
+        return {"status": "MariaDB connection pool is not available"}
+    return db_pool.stats()
+
+
+@app.get("/sql_cache_stats")
+async def read_sql_cache_stats():
+    """Returns size and hit/miss counters of the SQL read cache."""
+    if sql_cache is None:
+        return {"status": "SQL read cache is disabled"}
+    return sql_cache.stats()
+
+
 @app.get("/get_datetime")
-def api_get_datetime(
+async def api_get_datetime(
         myParam: str = Query(..., description="The city to get the date and time for, e.g., 'Paris, France'")):
     """API endpoint to get the current date and time."""
-    result = get_date_time(myParam)
+    result = await get_date_time(myParam)
     if "error" in result:
         raise HTTPException(status_code=404, detail=result["error"])
     return result
 
 
 @app.get("/get_weather")
-def api_get_weather(myParam: str = Query(..., description="The city to get the weather for, e.g., 'London, UK'")):
+async def api_get_weather(myParam: str = Query(..., description="The city to get the weather for, e.g., 'London, UK'")):
     """API endpoint to get the current weather."""
-    result = get_weather(myParam)
+    result = await get_weather(myParam)
     if "error" in result:
         # Check for specific HTTP errors if possible from the original response
         if "cod" in result and result["cod"] != 200:
@@ -267,7 +780,7 @@ def api_get_weather(myParam: str = Query(..., description="The city to get the w
 
 
 @app.get("/get_calc")
-def api_get_calc(myParam: str = Query(..., description="The calc operation, e.g., 'ADD, 2, 3' 'SUB, 2, 3'")):
+async def api_get_calc(myParam: str = Query(..., description="The calc operation, e.g., 'ADD, 2, 3' 'SUB, 2, 3'")):
     """API endpoint to get the current calc."""
 
     result = get_Calc(myParam)
@@ -280,10 +793,11 @@ def api_get_calc(myParam: str = Query(..., description="The calc operation, e.g.
 
 
 @app.get("/get_SQL_response")
-def api_get_SQL_response(myParam: str = Query(..., description="Returns the result of SQL statement formatted as String")):
+async def api_get_SQL_response(myParam: str = Query(..., description="Returns the result of SQL statement formatted as String")):
     """API endpoint to get the current SQL statement."""
 
-    result = Get_SQL(myParam)
+    # The MariaDB connector is blocking, so the pooled query runs in a worker thread
+    result = await asyncio.to_thread(Get_SQL, myParam)
     if "error" in result:
         # Check for specific HTTP errors if possible from the original response
         if "cod" in result and result["cod"] != 200:
@@ -293,10 +807,10 @@ def api_get_SQL_response(myParam: str = Query(..., description="Returns the resu
 
 
 @app.get("/put_SQL_insert")
-def api_get_SQL_response(myParam: str = Query(..., description="Update some SQL table")):
+async def api_put_SQL_insert(myParam: str = Query(..., description="Update some SQL table")):
     """API endpoint to get the current SQL statement."""
 
-    result = Update_SQL(myParam)
+    result = await asyncio.to_thread(Update_SQL, myParam)
     if "error" in result:
         # Check for specific HTTP errors if possible from the original response
         if "cod" in result and result["cod"] != 200:
@@ -304,8 +818,84 @@ def api_get_SQL_response(myParam: str = Query(..., description="Update some SQL
         raise HTTPException(status_code=500, detail=result["error"])
     return result
 
+# --- Batch Endpoint ---
+
+# Maximum number of tool calls accepted in one /batch request
+BATCH_MAX_ITEMS = int(os.getenv('MCP_BATCH_MAX_ITEMS', '32'))
+
+# Tool name -> endpoint function, so a batch item behaves exactly like its GET request
+TOOL_ENDPOINTS = {
+    "get_datetime": api_get_datetime,
+    "get_weather": api_get_weather,
+    "get_calc": api_get_calc,
+    "get_SQL_response": api_get_SQL_response,
+    "put_SQL_insert": api_put_SQL_insert,
+}
+
+
+class BatchItem(BaseModel):
+    tool: str
+    param: str
+
+
+async def run_batch_item(item: BatchItem) -> dict:
+    """Runs one batch item, turning endpoint errors into a per-item error entry."""
+    endpoint = TOOL_ENDPOINTS.get(item.tool)
+    if endpoint is None:
+        return {"tool": item.tool, "status_code": 404, "error": f'Unknown tool "{item.tool}".'}
+    try:
+        return {"tool": item.tool, "status_code": 200, "result": await endpoint(myParam=item.param)}
+    except HTTPException as e:
+        return {"tool": item.tool, "status_code": e.status_code, "error": e.detail}
+    except Exception as e:
+        return {"tool": item.tool, "status_code": 500, "error": str(e)}
+
+
+@app.post("/batch")
+async def api_batch(items: List[BatchItem]):
+    """Runs several tool calls concurrently and returns their results in request order."""
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"A batch accepts at most {BATCH_MAX_ITEMS} items.")
+    results = await asyncio.gather(*(run_batch_item(item) for item in items))
+    return {"results": results}
+
+
+# --- Benchmarks ---
+
+def benchmark_timezone_lookup(rounds: int = 20):
+    """Compares per-call latency of a fresh TimezoneFinder, a shared one, and the memoized lookup."""
+    global timezone_finder
+    points = [(-33.8688, 151.2093), (51.5072, -0.1276), (35.6762, 139.6503),
+              (40.7128, -74.0060), (48.8566, 2.3522)]
+
+    def per_call(fn, n):
+        start = time.perf_counter()
+        for i in range(n):
+            lat, lng = points[i % len(points)]
+            fn(lat, lng)
+        return (time.perf_counter() - start) / n * 1000
+
+    fresh_ms = per_call(lambda lat, lng: TimezoneFinder().timezone_at(lat=lat, lng=lng), rounds)
+
+    start = time.perf_counter()
+    timezone_finder = load_timezone_finder()
+    load_ms = (time.perf_counter() - start) * 1000
+    shared_ms = per_call(lambda lat, lng: timezone_finder.timezone_at(lat=lat, lng=lng), rounds * 10)
+
+    _timezone_at_rounded.cache_clear()
+    memo_ms = per_call(find_timezone, rounds * 100)
+
+    print(f"TimezoneFinder per call  : {fresh_ms:9.3f} ms/lookup")
+    print(f"Shared finder (load {load_ms:.0f} ms): {shared_ms:9.3f} ms/lookup")
+    print(f"Shared finder + memo     : {memo_ms:9.3f} ms/lookup")
+    print(f"Memo cache               : {_timezone_at_rounded.cache_info()}")
+
+
 # --- Main entry point to run the server ---
 if __name__ == "__main__":
+    if "--benchmark-timezone" in sys.argv:
+        benchmark_timezone_lookup()
+        sys.exit(0)
     print("Starting MCP Server ...")
     uvicorn.run(app, host="127.0.0.1", port=8000)
     
@@ -0,0 +1,78 @@
+"""
+Prompt caching for the Anthropic provider, run against a fake chat model: no Anthropic
+API, Ollama, Chroma or MCP server is needed.
+
+    cd source && python -m pytest -q test_prompt_cache.py
+"""
+import pytest
+
+pytest.importorskip("langgraph")
+pytest.importorskip("langchain_anthropic")
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+import little_mcp
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+class RecordingChatModel(GenericFakeChatModel):
+    """Answers from a fixed list and remembers the tool schemas and messages it was sent."""
+    bound_tools: list = []
+    calls: list = []
+
+    def bind_tools(self, tools, **kwargs):
+        self.bound_tools.extend(tools)
+        return self.bind(tools=tools, **kwargs)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        # the fake model's _stream goes through _generate too
+        self.calls.append(messages)
+        return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+class StubRAGSystem:
+    def query(self, question: str) -> str:
+        return "stub answer"
+
+    async def aquery(self, question: str) -> str:
+        return "stub answer"
+
+
+@pytest.fixture
+def client():
+    llm = RecordingChatModel(messages=iter([AIMessage(content="First answer"), AIMessage(content="Second answer")]))
+    client = little_mcp.FastMCPLangChainClient(
+        pdf_path="unused.pdf", provider="anthropic", prompt_caching=True,
+        llm=llm, rag_system=StubRAGSystem(), probe_server=False,
+    )
+    client.initialize()
+    yield client
+    client.close()
+
+
+def test_cache_breakpoint_on_last_tool_schema(client):
+    schemas = client.llm.bound_tools
+    assert [schema["name"] for schema in schemas][-1] == "document_qa_system"
+    assert schemas[-1]["cache_control"] == CACHE_CONTROL
+    assert all("cache_control" not in schema for schema in schemas[:-1])
+
+
+def test_cache_breakpoint_on_last_history_message(client):
+    assert client.chat("Hello") == "First answer"
+    assert client.chat("And again?") == "Second answer"
+
+    *history, new_message = client.llm.calls[-1]
+    assert new_message.content == "And again?"
+    assert history[-1].content == [{"type": "text", "text": "First answer", "cache_control": CACHE_CONTROL}]
+    assert history[0].content == "Hello"
+
+
+def test_prompt_cache_usage_sums_model_calls():
+    usage = {"input_tokens": 1200, "output_tokens": 10, "total_tokens": 1210,
+             "input_token_details": {"cache_read": 1000, "cache_creation": 150}}
+    messages = [AIMessage(content="", usage_metadata=usage), AIMessage(content="done", usage_metadata=usage)]
+    assert little_mcp.prompt_cache_usage(messages) == {
+        "calls": 2, "input": 2400, "cache_read": 2000, "cache_write": 300,
+    }
@@ -0,0 +1,78 @@
+"""
+SQL read cache: table extraction and invalidation. No MariaDB is needed.
+
+    cd source && python -m pytest -q test_sql_cache.py
+"""
+import pytest
+
+mcp_server = pytest.importorskip("mcp_server")
+
+
+@pytest.mark.parametrize("query, tables", [
+    ("SELECT ITEM, QUANTITY FROM FRUITS", {"fruits"}),
+    ("SELECT * FROM FRUITS JOIN VEGGIE ON FRUITS.ITEM = VEGGIE.ITEM", {"fruits", "veggie"}),
+    ("SELECT * FROM FRUITS STRAIGHT_JOIN VEGGIE", {"fruits", "veggie"}),
+    ("SELECT * FROM FRUITS f LEFT JOIN VEGGIE AS v USING (ITEM) WHERE 1", {"fruits", "veggie"}),
+    ("SELECT * FROM `shop`.`FRUITS` f, VEGGIE v WHERE x IN (SELECT y FROM Z)", {"fruits", "veggie", "z"}),
+    ("SELECT 'FROM X' FROM FRUITS ORDER BY ITEM", {"fruits"}),
+    ("SELECT NOW()", set()),
+    ("SHOW TABLES", set()),
+])
+def test_read_tables(query, tables):
+    assert mcp_server.sql_read_tables(query) == tables
+
+
+@pytest.mark.parametrize("statement, tables", [
+    ("UPDATE FRUITS SET QUANTITY=4 WHERE ITEM='ORANGE';", {"fruits"}),
+    ("UPDATE FRUITS, VEGGIE SET FRUITS.Q = VEGGIE.Q", {"fruits", "veggie"}),
+    ("UPDATE FRUITS f JOIN VEGGIE v ON f.ITEM = v.ITEM SET f.Q = 1", {"fruits", "veggie"}),
+    ("INSERT INTO VEGGIE VALUES ('LEEK', 1)", {"veggie"}),
+    ("INSERT INTO FRUITS SET ITEM='KIWI'", {"fruits"}),
+    ("LOAD DATA INFILE 'x' INTO TABLE FRUITS", {"fruits"}),
+    ("DELETE FROM FRUITS WHERE QUANTITY = 0", {"fruits"}),
+    ("DROP TABLE IF EXISTS FRUITS", {"fruits"}),
+    # tables that cannot be told: the whole cache is invalidated
+    ("TRUNCATE FRUITS", set()),
+    ("INSERT VEGGIE VALUES ('LEEK', 1)", set()),
+    ("CALL restock()", set()),
+])
+def test_write_tables(statement, tables):
+    assert mcp_server.sql_write_tables(statement) == tables
+
+
+def cached_read(cache, query, result):
+    _, token = cache.get(query)
+    cache.put(token, result)
+
+
+def test_write_evicts_join_on_second_table():
+    cache = mcp_server.SQLReadCache()
+    cached_read(cache, "SELECT * FROM FRUITS JOIN VEGGIE ON FRUITS.ITEM = VEGGIE.ITEM", "rows")
+    cached_read(cache, "SELECT ITEM FROM FRUITS", "fruit rows")
+    cache.invalidate("UPDATE VEGGIE SET QUANTITY = 2")
+    assert cache.get("SELECT * FROM FRUITS JOIN VEGGIE ON FRUITS.ITEM = VEGGIE.ITEM")[0] is None
+    assert cache.get("SELECT ITEM FROM FRUITS")[0] == "fruit rows"
+
+
+def test_load_data_evicts_table():
+    cache = mcp_server.SQLReadCache()
+    cached_read(cache, "SELECT ITEM FROM FRUITS", "rows")
+    cache.invalidate("LOAD DATA INFILE 'x' INTO TABLE FRUITS")
+    assert cache.get("SELECT ITEM FROM FRUITS")[0] is None
+
+
+def test_read_in_flight_during_unknown_write_is_not_stored():
+    cache = mcp_server.SQLReadCache()
+    _, token = cache.get("SELECT ITEM FROM FRUITS")
+    cache.invalidate("CALL restock()")
+    cache.put(token, "STALE")
+    assert cache.get("SELECT ITEM FROM FRUITS")[0] is None
+
+
+def test_lru_bound_on_bytes():
+    cache = mcp_server.SQLReadCache(max_bytes=200)
+    for i in range(10):
+        cached_read(cache, f"SELECT {i} FROM T", "x" * 40)
+    stats = cache.stats()
+    assert stats["bytes"] <= 200 and stats["evictions"] > 0
+    assert cache.get("SELECT 9 FROM T")[0] == "x" * 40